@@ -7,6 +7,152 @@
 
 static const uint32_t PONG_INTERVAL_MS = 10000;
 static const uint32_t DISCOVER_INTERVAL_MS = 10000;
+static const uint32_t PING_JITTER_MAX_MS = 10000;  // cap on the hub's reply-delay hint
+
+#if ETBUS_ENABLE_V2
+// Protocol v2 envelope: MessagePack map with integer keys (matches HA codec.py)
+enum : uint8_t {
+  V2_V = 0, V2_TYPE = 1, V2_ID = 2, V2_CLASS = 3,
+  V2_PAYLOAD = 4, V2_BOOT = 5, V2_SEQ = 6, V2_SEALED = 7, V2_CID = 8
+};
+enum : uint8_t { V2_S_KID = 0, V2_S_CTR = 1, V2_S_NONCE = 2, V2_S_CT = 3, V2_S_TAG = 4 };
+
+namespace {
+
+// Just enough MessagePack to write and walk the outer envelope. Payload
+// maps themselves go through ArduinoJson's serializeMsgPack/deserializeMsgPack.
+struct MpWriter {
+  uint8_t* buf;
+  size_t cap;
+  size_t len = 0;
+  bool ok = true;
+
+  MpWriter(uint8_t* b, size_t c) : buf(b), cap(c) {}
+
+  void raw(const uint8_t* p, size_t n) {
+    if (!ok || len + n > cap) { ok = false; return; }
+    for (size_t i = 0; i < n; i++) buf[len + i] = p[i];
+    len += n;
+  }
+  void byte(uint8_t b) { raw(&b, 1); }
+  void be(uint64_t v, int n) { for (int i = n - 1; i >= 0; i--) byte((uint8_t)(v >> (i * 8))); }
+
+  void map(uint8_t n) { byte((uint8_t)(0x80 | (n & 0x0F))); }   // n < 16
+  void uint(uint64_t v) {
+    if (v < 0x80) byte((uint8_t)v);
+    else if (v <= 0xFF) { byte(0xCC); be(v, 1); }
+    else if (v <= 0xFFFF) { byte(0xCD); be(v, 2); }
+    else if (v <= 0xFFFFFFFFULL) { byte(0xCE); be(v, 4); }
+    else { byte(0xCF); be(v, 8); }
+  }
+  void str(const char* s) {
+    size_t n = 0;
+    while (s[n]) n++;
+    if (n < 32) byte((uint8_t)(0xA0 | n));
+    else if (n <= 0xFF) { byte(0xD9); be(n, 1); }
+    else { byte(0xDA); be(n, 2); }
+    raw((const uint8_t*)s, n);
+  }
+  void bin(const uint8_t* p, size_t n) {
+    if (n <= 0xFF) { byte(0xC4); be(n, 1); }
+    else { byte(0xC5); be(n, 2); }
+    raw(p, n);
+  }
+};
+
+struct MpReader {
+  const uint8_t* p;
+  const uint8_t* end;
+  bool ok = true;
+
+  MpReader(const uint8_t* b, size_t n) : p(b), end(b + n) {}
+
+  bool need(size_t n) {
+    if (!ok || (size_t)(end - p) < n) ok = false;
+    return ok;
+  }
+  uint8_t next() { return need(1) ? *p++ : 0; }
+  uint64_t be(int n) {
+    if (!need((size_t)n)) return 0;
+    uint64_t v = 0;
+    for (int i = 0; i < n; i++) v = (v << 8) | *p++;
+    return v;
+  }
+
+  int32_t mapLen() {
+    uint8_t t = next();
+    if ((t & 0xF0) == 0x80) return t & 0x0F;
+    if (t == 0xDE) return (int32_t)be(2);
+    ok = false;
+    return 0;
+  }
+  bool uintVal(uint64_t& out) {
+    uint8_t t = next();
+    if (t < 0x80) out = t;
+    else if (t >= 0xCC && t <= 0xCF) out = be(1 << (t - 0xCC));
+    else ok = false;
+    return ok;
+  }
+  bool strVal(const char*& s, size_t& n) {
+    uint8_t t = next();
+    if ((t & 0xE0) == 0xA0) n = t & 0x1F;
+    else if (t == 0xD9) n = (size_t)be(1);
+    else if (t == 0xDA) n = (size_t)be(2);
+    else { ok = false; return false; }
+    if (!need(n)) return false;
+    s = (const char*)p;
+    p += n;
+    return true;
+  }
+  bool binVal(const uint8_t*& b, size_t& n) {
+    uint8_t t = next();
+    if (t == 0xC4) n = (size_t)be(1);
+    else if (t == 0xC5) n = (size_t)be(2);
+    else { ok = false; return false; }
+    if (!need(n)) return false;
+    b = p;
+    p += n;
+    return true;
+  }
+
+  // Skip one complete element
+  void skip(int depth = 0) {
+    if (depth > 8) { ok = false; return; }
+    uint8_t t = next();
+    if (!ok) return;
+    if (t < 0x80 || t >= 0xE0 || t == 0xC0 || t == 0xC2 || t == 0xC3) return;
+    if ((t & 0xE0) == 0xA0) { skipBytes(t & 0x1F); return; }
+    if ((t & 0xF0) == 0x90) { skipItems(t & 0x0F, depth); return; }
+    if ((t & 0xF0) == 0x80) { skipItems(2 * (t & 0x0F), depth); return; }
+    switch (t) {
+      case 0xCC: case 0xD0: skipBytes(1); return;
+      case 0xCD: case 0xD1: skipBytes(2); return;
+      case 0xCA: case 0xCE: case 0xD2: skipBytes(4); return;
+      case 0xCB: case 0xCF: case 0xD3: skipBytes(8); return;
+      case 0xC4: case 0xD9: skipBytes((size_t)be(1)); return;
+      case 0xC5: case 0xDA: skipBytes((size_t)be(2)); return;
+      case 0xC6: case 0xDB: skipBytes((size_t)be(4)); return;
+      case 0xDC: skipItems((uint32_t)be(2), depth); return;
+      case 0xDD: skipItems((uint32_t)be(4), depth); return;
+      case 0xDE: skipItems(2 * (uint32_t)be(2), depth); return;
+      case 0xDF: skipItems(2 * (uint32_t)be(4), depth); return;
+      default: ok = false; return;
+    }
+  }
+  void skipBytes(size_t n) { if (need(n)) p += n; }
+  void skipItems(uint32_t n, int depth) { for (uint32_t i = 0; i < n && ok; i++) skip(depth + 1); }
+};
+
+bool mpStrEq(const char* s, size_t n, const char* lit) {
+  size_t i = 0;
+  for (; i < n; i++) {
+    if (!lit[i] || lit[i] != s[i]) return false;
+  }
+  return lit[i] == 0;
+}
+
+}  // namespace
+#endif
 
 ETBus::ETBus() {
   _port = ETBUS_DEFAULT_PORT;
@@ -257,6 +403,33 @@ bool ETBus::_discoverRateReady(unsigned long now) const {
   return _lastDiscoverMs == 0 || now - _lastDiscoverMs >= DISCOVER_INTERVAL_MS;
 }
 
+void ETBus::_rememberHubSession(JsonObject payload) {
+  const char* s = payload.isNull() ? "" : (payload["session"] | "");
+  size_t i = 0;
+  for (; s[i] && i < sizeof(_hubSession) - 1; i++) _hubSession[i] = s[i];
+  _hubSession[i] = 0;
+}
+
+bool ETBus::_hubSessionIs(JsonObject payload) const {
+  const char* s = payload["session"] | "";
+  if (!_hubSession[0]) return false;
+  for (size_t i = 0; i < sizeof(_hubSession); i++) {
+    if (s[i] != _hubSession[i]) return false;
+    if (!s[i]) return true;
+  }
+  return false;
+}
+
+void ETBus::_answerPing(unsigned long now) {
+  if (_discoverRateReady(now)) {
+    sendDiscover();
+    _lastDiscoverMs = now;
+  }
+  sendPong();
+  _lastPongMs = now;
+  if (_syncHandler) _syncHandler();
+}
+
 void ETBus::_learnHub(const IPAddress& from, const char* msg_type) {
   if (!_hubKnown || _hubIP != from) {
     _hubIP = from;
@@ -283,6 +456,27 @@ void ETBus::_maybeLearnPortFromPing(JsonObject payload) {
   }
 }
 
+void ETBus::_learnHubFeatures(JsonObject payload) {
+#if ETBUS_ENABLE_V2
+  bool v2 = false;
+  JsonArray features = payload["features"].as<JsonArray>();
+  if (!features.isNull()) {
+    for (JsonVariant f : features) {
+      if (f == "v2") v2 = true;
+    }
+  }
+#if ETBUS_DEBUG
+  if (v2 != _hubV2) {
+    Serial.print("[ETBUS] hub v2 envelope: ");
+    Serial.println(v2 ? "on" : "off");
+  }
+#endif
+  _hubV2 = v2;
+#else
+  (void)payload;
+#endif
+}
+
 void ETBus::_printCryptoPacket(const char* dir, uint64_t ctr,
                                const uint8_t* nonce12,
                                const uint8_t* ct, size_t ct_len,
@@ -340,9 +534,52 @@ bool ETBus::_decryptIncomingCommand(JsonObject in_wrapper, JsonObject out_plain_
   if (!(in_wrapper.containsKey("_enc") && (int)in_wrapper["_enc"] == 1)) return false;
 
   const int kid = (int)(in_wrapper["kid"] | 0);
-  if (kid != (int)_kid) return false;
-
   uint64_t ctr = (uint64_t)((uint64_t)(in_wrapper["ctr"] | 0));
+  if (!_acceptCommandCtr(kid, ctr)) return false;
+
+  const char* nonce_b64 = in_wrapper["nonce"];
+  const char* ct_b64    = in_wrapper["ct"];
+  const char* tag_b64   = in_wrapper["tag"];
+  if (!nonce_b64 || !ct_b64 || !tag_b64) return false;
+
+  uint8_t nonce[12]; size_t nonce_len = 0;
+  if (!_b64decode(nonce_b64, nonce, sizeof(nonce), nonce_len) || nonce_len != 12) return false;
+
+  static uint8_t ct[1024]; size_t ct_len = 0;
+  if (!_b64decode(ct_b64, ct, sizeof(ct), ct_len) || ct_len == 0) return false;
+
+  uint8_t tag[16]; size_t tag_len = 0;
+  if (!_b64decode(tag_b64, tag, sizeof(tag), tag_len) || tag_len != 16) return false;
+
+  static uint8_t pt[1024];
+  if (ct_len >= sizeof(pt)) return false;
+
+  _printCryptoFull("DEC CMD", nonce_b64, ct_b64, tag_b64);
+
+  if (!_openCommand(ctr, nonce, ct, ct_len, tag, pt)) return false;
+
+  static StaticJsonDocument<1024> tmp;
+  tmp.clear();
+  if (deserializeJson(tmp, (const char*)pt)) return false;
+
+  if (!tmp.is<JsonObject>()) return false;
+
+  // copy fields into caller-provided object
+  for (JsonPair kv : tmp.as<JsonObject>()) {
+    out_plain_obj[kv.key()] = kv.value();
+  }
+
+  _rx_cmd_last_ctr = ctr;
+  return true;
+#else
+  (void)in_wrapper; (void)out_plain_obj;
+  return false;
+#endif
+}
+
+bool ETBus::_acceptCommandCtr(int kid, uint64_t ctr) {
+#if ETBUS_ENABLE_ENCRYPTION
+  if (kid != (int)_kid) return false;
   if (ctr == 0) return false;
 
   if (ctr <= _rx_cmd_last_ctr) {
@@ -363,26 +600,18 @@ bool ETBus::_decryptIncomingCommand(JsonObject in_wrapper, JsonObject out_plain_
       return false;
     }
   }
+  return true;
+#else
+  (void)kid; (void)ctr;
+  return false;
+#endif
+}
 
-  const char* nonce_b64 = in_wrapper["nonce"];
-  const char* ct_b64    = in_wrapper["ct"];
-  const char* tag_b64   = in_wrapper["tag"];
-  if (!nonce_b64 || !ct_b64 || !tag_b64) return false;
-
-  uint8_t nonce[12]; size_t nonce_len = 0;
-  if (!_b64decode(nonce_b64, nonce, sizeof(nonce), nonce_len) || nonce_len != 12) return false;
-
-  static uint8_t ct[1024]; size_t ct_len = 0;
-  if (!_b64decode(ct_b64, ct, sizeof(ct), ct_len) || ct_len == 0) return false;
-
-  uint8_t tag[16]; size_t tag_len = 0;
-  if (!_b64decode(tag_b64, tag, sizeof(tag), tag_len) || tag_len != 16) return false;
-
-  static uint8_t pt[1024];
-  if (ct_len >= sizeof(pt)) return false;
-
+bool ETBus::_openCommand(uint64_t ctr, const uint8_t nonce[12],
+                         const uint8_t* ct, size_t ct_len,
+                         const uint8_t tag[16], uint8_t* pt_out) {
+#if ETBUS_ENABLE_ENCRYPTION
   _printCryptoPacket("DEC CMD", ctr, nonce, ct, ct_len, tag);
-  _printCryptoFull("DEC CMD", nonce_b64, ct_b64, tag_b64);
 
   bool ok = ETChaCha20Poly1305::decrypt(
     _key,
@@ -390,7 +619,7 @@ bool ETBus::_decryptIncomingCommand(JsonObject in_wrapper, JsonObject out_plain_
     nullptr, 0,            // AAD EMPTY
     ct, ct_len,
     tag,
-    pt
+    pt_out
   );
 
   if (!ok) {
@@ -402,23 +631,34 @@ bool ETBus::_decryptIncomingCommand(JsonObject in_wrapper, JsonObject out_plain_
     return false;
   }
 
-  pt[ct_len] = 0;
-
-  static StaticJsonDocument<1024> tmp;
-  tmp.clear();
-  if (deserializeJson(tmp, (const char*)pt)) return false;
+  pt_out[ct_len] = 0;
+  return true;
+#else
+  (void)ctr; (void)nonce; (void)ct; (void)ct_len; (void)tag; (void)pt_out;
+  return false;
+#endif
+}
 
-  if (!tmp.is<JsonObject>()) return false;
+bool ETBus::_sealState(const uint8_t* pt, size_t pt_len, uint64_t ctr,
+                       uint8_t nonce_out[12], uint8_t* ct_out, uint8_t tag_out[16]) {
+#if ETBUS_ENABLE_ENCRYPTION
+  nonce_out[0] = 0x01; nonce_out[1] = 0x00; nonce_out[2] = 0x00; nonce_out[3] = 0x00;
+  _u64_le(&nonce_out[4], ctr);
 
-  // copy fields into caller-provided object
-  for (JsonPair kv : tmp.as<JsonObject>()) {
-    out_plain_obj[kv.key()] = kv.value();
-  }
+  bool ok = ETChaCha20Poly1305::encrypt(
+    _key,
+    nonce_out,
+    nullptr, 0,                      // AAD EMPTY
+    pt, pt_len,
+    ct_out,
+    tag_out
+  );
+  if (!ok) return false;
 
-  _rx_cmd_last_ctr = ctr;
+  _printCryptoPacket("ENC STATE", ctr, nonce_out, ct_out, pt_len, tag_out);
   return true;
 #else
-  (void)in_wrapper; (void)out_plain_obj;
+  (void)pt; (void)pt_len; (void)ctr; (void)nonce_out; (void)ct_out; (void)tag_out;
   return false;
 #endif
 }
@@ -432,23 +672,10 @@ bool ETBus::_encryptWrapperState(JsonObject plain, uint64_t ctr, JsonObject out_
   if (pt_len == 0 || pt_len >= sizeof(pt_buf)) return false;
 
   uint8_t nonce[12];
-  nonce[0] = 0x01; nonce[1] = 0x00; nonce[2] = 0x00; nonce[3] = 0x00;
-  _u64_le(&nonce[4], ctr);
-
   static uint8_t ct[768];
   uint8_t tag[16];
 
-  bool ok = ETChaCha20Poly1305::encrypt(
-    _key,
-    nonce,
-    nullptr, 0,                      // AAD EMPTY
-    (const uint8_t*)pt_buf, pt_len,
-    ct,
-    tag
-  );
-  if (!ok) return false;
-
-  _printCryptoPacket("ENC STATE", ctr, nonce, ct, pt_len, tag);
+  if (!_sealState((const uint8_t*)pt_buf, pt_len, ctr, nonce, ct, tag)) return false;
 
   static char nonce_b64[64], ct_b64[1100], tag_b64[64];
   if (!_b64encode(nonce, sizeof(nonce), nonce_b64, sizeof(nonce_b64))) return false;
@@ -536,6 +763,169 @@ void ETBus::_sendEnvelopeEncryptedState(JsonObject plain_payload) {
 #endif
 }
 
+void ETBus::_sendEnvelopeStateV2(JsonObject payload) {
+#if ETBUS_ENABLE_V2
+  static uint8_t buf[1200];
+  MpWriter w(buf, sizeof(buf));
+
+  w.map(7);
+  w.uint(V2_V);     w.uint(2);
+  w.uint(V2_TYPE);  w.str("state");
+  w.uint(V2_ID);    w.str(_id ? _id : "");
+  w.uint(V2_CLASS); w.str(_class ? _class : "");
+  w.uint(V2_BOOT);  w.str(_bootId);
+  w.uint(V2_SEQ);   w.uint(++_seq);
+
+#if ETBUS_ENABLE_ENCRYPTION
+  if (_crypto_enabled) {
+    // Plaintext is MessagePack too; nonce/ct/tag go out as raw bin fields
+    static uint8_t pt[768];
+    size_t pt_len = serializeMsgPack(payload, pt, sizeof(pt));
+    if (pt_len == 0 || pt_len >= sizeof(pt)) return;
+
+    uint8_t nonce[12];
+    static uint8_t ct[768];
+    uint8_t tag[16];
+
+    _tx_state_ctr++;
+    if (!_sealState(pt, pt_len, _tx_state_ctr, nonce, ct, tag)) return;
+
+    w.uint(V2_SEALED);
+    w.map(5);
+    w.uint(V2_S_KID);   w.uint(_kid);
+    w.uint(V2_S_CTR);   w.uint(_tx_state_ctr);
+    w.uint(V2_S_NONCE); w.bin(nonce, sizeof(nonce));
+    w.uint(V2_S_CT);    w.bin(ct, pt_len);
+    w.uint(V2_S_TAG);   w.bin(tag, sizeof(tag));
+  } else
+#endif
+  {
+    w.uint(V2_PAYLOAD);
+    if (!w.ok) return;
+    size_t n = serializeMsgPack(payload, buf + w.len, sizeof(buf) - w.len);
+    if (n == 0) return;
+    w.len += n;
+  }
+
+  if (!w.ok) return;
+
+  _udp.beginPacket(_hubIP, _port);
+  _udp.write(buf, w.len);
+  _udp.endPacket();
+#else
+  (void)payload;
+#endif
+}
+
+void ETBus::_handlePacketV2(const uint8_t* buf, size_t len, const IPAddress& from) {
+#if ETBUS_ENABLE_V2
+  MpReader r(buf, len);
+  int32_t n = r.mapLen();
+
+  uint64_t v = 0;
+  const char* type = nullptr;
+  size_t type_len = 0;
+  char cls[48] = {0};
+  const uint8_t* payload = nullptr;
+  size_t payload_len = 0;
+
+  char cid[sizeof(_lastCid)] = {0};
+
+  bool sealed = false;
+  uint64_t kid = 0, ctr = 0;
+  const uint8_t* nonce = nullptr;
+  const uint8_t* ct = nullptr;
+  const uint8_t* tag = nullptr;
+  size_t nonce_len = 0, ct_len = 0, tag_len = 0;
+
+  for (int32_t i = 0; i < n && r.ok; i++) {
+    uint64_t key = 0;
+    if (!r.uintVal(key)) return;
+    switch (key) {
+      case V2_V: r.uintVal(v); break;
+      case V2_TYPE: r.strVal(type, type_len); break;
+      case V2_CLASS: {
+        const char* s = nullptr;
+        size_t sl = 0;
+        if (r.strVal(s, sl)) {
+          if (sl >= sizeof(cls)) sl = sizeof(cls) - 1;
+          for (size_t k = 0; k < sl; k++) cls[k] = s[k];
+          cls[sl] = 0;
+        }
+        break;
+      }
+      case V2_CID: {
+        const char* s = nullptr;
+        size_t sl = 0;
+        if (r.strVal(s, sl)) {
+          if (sl >= sizeof(cid)) sl = sizeof(cid) - 1;
+          for (size_t k = 0; k < sl; k++) cid[k] = s[k];
+          cid[sl] = 0;
+        }
+        break;
+      }
+      case V2_PAYLOAD:
+        payload = r.p;
+        r.skip();
+        payload_len = (size_t)(r.p - payload);
+        break;
+      case V2_SEALED: {
+        sealed = true;
+        int32_t m = r.mapLen();
+        for (int32_t j = 0; j < m && r.ok; j++) {
+          uint64_t sk = 0;
+          if (!r.uintVal(sk)) return;
+          switch (sk) {
+            case V2_S_KID: r.uintVal(kid); break;
+            case V2_S_CTR: r.uintVal(ctr); break;
+            case V2_S_NONCE: r.binVal(nonce, nonce_len); break;
+            case V2_S_CT: r.binVal(ct, ct_len); break;
+            case V2_S_TAG: r.binVal(tag, tag_len); break;
+            default: r.skip(); break;
+          }
+        }
+        break;
+      }
+      default: r.skip(); break;
+    }
+  }
+
+  if (!r.ok || v != 2 || !type) return;
+
+  // The hub only uses v2 for commands; ping/sync stay JSON
+  if (!mpStrEq(type, type_len, "command")) return;
+
+  _learnHub(from, "command");
+  if (!_cmdHandler) return;
+  if (_ackDuplicate(cid)) return;
+
+  StaticJsonDocument<1024> plainDoc;
+  bool ok = false;
+
+  if (sealed) {
+#if ETBUS_ENABLE_ENCRYPTION
+    if (_crypto_enabled && nonce_len == 12 && tag_len == 16 && ct_len > 0 &&
+        _acceptCommandCtr((int)kid, ctr)) {
+      static uint8_t pt[1024];
+      if (ct_len < sizeof(pt) && _openCommand(ctr, nonce, ct, ct_len, tag, pt) &&
+          !deserializeMsgPack(plainDoc, (const char*)pt, ct_len) && plainDoc.is<JsonObject>()) {
+        _rx_cmd_last_ctr = ctr;
+        ok = true;
+      }
+    }
+    if (!ok) Serial.println("[ETBUS] decrypt failed (command)");
+#endif
+  } else if (payload && !deserializeMsgPack(plainDoc, (const char*)payload, payload_len)) {
+    ok = plainDoc.is<JsonObject>();
+  }
+
+  if (ok) _cmdHandler(cls, plainDoc.as<JsonObject>());
+  _ackCommand(cid, ok);
+#else
+  (void)buf; (void)len; (void)from;
+#endif
+}
+
 void ETBus::sendDiscover() {
   StaticJsonDocument<384> pdoc;
   JsonObject p = pdoc.to<JsonObject>();
@@ -547,6 +937,11 @@ void ETBus::sendDiscover() {
   features.add("encrypted");
   features.add("ack");
   features.add("sync");
+  features.add("bulk");
+  features.add("paced");
+#if ETBUS_ENABLE_V2
+  features.add("v2");
+#endif
   _sendEnvelopePlain("discover", p, true);
 }
 
@@ -561,6 +956,11 @@ void ETBus::sendDiscover(JsonObject extra_payload) {
   features.add("encrypted");
   features.add("ack");
   features.add("sync");
+  features.add("bulk");
+  features.add("paced");
+#if ETBUS_ENABLE_V2
+  features.add("v2");
+#endif
 
   for (JsonPair kv : extra_payload) {
     p[kv.key()] = kv.value();
@@ -592,6 +992,12 @@ void ETBus::sendError(const char* code, const char* message) {
 }
 
 void ETBus::sendState(JsonObject payload) {
+#if ETBUS_ENABLE_V2
+  if (_hubKnown && _hubV2) {
+    _sendEnvelopeStateV2(payload);
+    return;
+  }
+#endif
   if (_crypto_enabled) {
     _sendEnvelopeEncryptedState(payload);
     return;
@@ -621,6 +1027,11 @@ void ETBus::sendRgbStateFx(bool on, uint8_t r, uint8_t g, uint8_t b, uint8_t bri
 }
 
 void ETBus::loop() {
+  if (_pingReplyPending && (long)(millis() - _pingReplyAtMs) >= 0) {
+    _pingReplyPending = false;
+    _answerPing(millis());
+  }
+
   if (millis() - _lastPongMs > PONG_INTERVAL_MS) {
     sendPong();
     _lastPongMs = millis();
@@ -639,7 +1050,17 @@ void ETBus::loop() {
   if (len <= 0) return;
   buf[len] = 0;
 
-  StaticJsonDocument<1700> doc;
+#if ETBUS_ENABLE_V2
+  uint8_t first = (uint8_t)buf[0];
+  if ((first & 0xF0) == 0x80 || first == 0xDE) {
+    _handlePacketV2((const uint8_t*)buf, (size_t)len, from);
+    return;
+  }
+#endif
+
+  // Static: bulk frames need a bigger document than fits comfortably on the stack
+  static StaticJsonDocument<ETBUS_RX_DOC_SIZE> doc;
+  doc.clear();
   if (deserializeJson(doc, buf)) return;
 
   int v = doc["v"] | 0;
@@ -653,39 +1074,105 @@ void ETBus::loop() {
   if (!payload.isNull() && (type[0]=='p' && type[1]=='i' && type[2]=='n' && type[3]=='g')) {
     _learnHub(from, "ping");
     _maybeLearnPortFromPing(payload);
+    _learnHubFeatures(payload);
     unsigned long now = millis();
-    if (_discoverRateReady(now)) {
-      sendDiscover();
-      _lastDiscoverMs = now;
+    // Unicast liveness probe: a pong is all the hub needs
+    if (payload["probe"] | false) {
+      _rememberHubSession(payload);
+      sendPong();
+      _lastPongMs = now;
+      return;
     }
-    sendPong();
-    _lastPongMs = now;
-    if (_syncHandler) _syncHandler();
+    // A pacing hub that already knows us (same session) only pings to find
+    // devices it has not heard from
+    if ((payload["unknown_only"] | false) && _hubSessionIs(payload)) return;
+    // Spread answers over the hub's window instead of all replying at once
+    uint32_t jitter = payload["jitter"] | 0;
+    if (jitter > PING_JITTER_MAX_MS) jitter = PING_JITTER_MAX_MS;
+    if (jitter > 0) {
+      _pingReplyAtMs = now + (unsigned long)random((long)jitter + 1);
+      _pingReplyPending = true;
+      return;
+    }
+    _answerPing(now);
     return;
   }
 
   if (type[0]=='s' && type[1]=='y' && type[2]=='n' && type[3]=='c') {
     _learnHub(from, "sync");
+    _rememberHubSession(payload);
     if (_syncHandler) _syncHandler();
     return;
   }
 
   if (type[0]=='c' && type[1]=='o' && type[2]=='m' && type[3]=='m' && type[4]=='a' && type[5]=='n' && type[6]=='d') {
     _learnHub(from, "command");
+    const char* cid = doc["cid"] | "";
+    if (_ackDuplicate(cid)) return;
+    _ackCommand(cid, _dispatchCommand(cls, payload));
+    return;
+  }
 
-    if (_cmdHandler) {
-      if (_crypto_enabled && !payload.isNull() && payload.containsKey("_enc")) {
-        StaticJsonDocument<1024> plainDoc;
-        JsonObject plainObj = plainDoc.to<JsonObject>();
+  // Multicast bulk frame from the hub: {"cmds":[{"to":id,"class":..,"payload":..},..]}
+  if (type[0]=='b' && type[1]=='u' && type[2]=='l' && type[3]=='k' && !payload.isNull()) {
+    JsonArray cmds = payload["cmds"].as<JsonArray>();
+    if (cmds.isNull() || !_id) return;
+    for (JsonVariant c : cmds) {
+      const char* to = c["to"] | "";
+      if (!_idEquals(to)) continue;
+      _learnHub(from, "bulk");
+      const char* ccls = c["class"] | "";
+      _dispatchCommand(ccls, c["payload"].as<JsonObject>());
+      return;
+    }
+  }
+}
 
-        if (_decryptIncomingCommand(payload, plainObj)) {
-          _cmdHandler(cls, plainObj);
-        } else {
-          Serial.println("[ETBUS] decrypt failed (command)");
-        }
-      } else {
-        _cmdHandler(cls, payload);
-      }
+bool ETBus::_idEquals(const char* s) const {
+  if (!_id || !s) return false;
+  size_t i = 0;
+  for (; _id[i]; i++) {
+    if (s[i] != _id[i]) return false;
+  }
+  return s[i] == 0;
+}
+
+bool ETBus::_dispatchCommand(const char* cls, JsonObject payload) {
+  if (!_cmdHandler) return false;
+
+  if (_crypto_enabled && !payload.isNull() && payload.containsKey("_enc")) {
+    StaticJsonDocument<1024> plainDoc;
+    JsonObject plainObj = plainDoc.to<JsonObject>();
+
+    if (_decryptIncomingCommand(payload, plainObj)) {
+      _cmdHandler(cls, plainObj);
+      return true;
     }
+    Serial.println("[ETBUS] decrypt failed (command)");
+    return false;
   }
+
+  _cmdHandler(cls, payload);
+  return true;
+}
+
+// A retransmitted command (same cid as the last one) is acked again without
+// running the handler twice. Checked before the counter, which would reject it.
+bool ETBus::_ackDuplicate(const char* cid) {
+  if (!cid || !cid[0] || !_lastCid[0]) return false;
+  for (size_t i = 0; i < sizeof(_lastCid); i++) {
+    if (cid[i] != _lastCid[i]) return false;
+    if (!cid[i]) break;
+  }
+  sendAck(_lastCid, _lastCidOk);
+  return true;
+}
+
+void ETBus::_ackCommand(const char* cid, bool ok) {
+  if (!cid || !cid[0]) return;
+  size_t i = 0;
+  for (; cid[i] && i < sizeof(_lastCid) - 1; i++) _lastCid[i] = cid[i];
+  _lastCid[i] = 0;
+  _lastCidOk = ok;
+  sendAck(_lastCid, ok);
 }
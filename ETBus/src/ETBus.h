@@ -6,7 +6,7 @@
 
 #include <ETChaCha20Poly1305.h>
 
-#define ETBUS_LIBRARY_VERSION "1.7"
+#define ETBUS_LIBRARY_VERSION "1.9"
 
 #ifndef ETBUS_ENABLE_ENCRYPTION
 #define ETBUS_ENABLE_ENCRYPTION 1
@@ -25,6 +25,17 @@
 #define ETBUS_DEBUG_CRYPTO_FULL 0
 #endif
 
+// Compact MessagePack envelope (protocol v2). Commands are accepted in either
+// format; state is sent as v2 once the hub advertises "v2" in its ping.
+#ifndef ETBUS_ENABLE_V2
+#define ETBUS_ENABLE_V2 1
+#endif
+
+// JSON document used for incoming packets (multicast bulk frames are the largest)
+#ifndef ETBUS_RX_DOC_SIZE
+#define ETBUS_RX_DOC_SIZE 3072
+#endif
+
 // Default multicast + port (match HA)
 #ifndef ETBUS_DEFAULT_PORT
 #define ETBUS_DEFAULT_PORT 5555
@@ -83,11 +94,21 @@ private:
   // Core send
   void _sendEnvelopePlain(const char* type, JsonObject payload, bool allow_multicast);
   void _sendEnvelopeEncryptedState(JsonObject plain_payload);
+  void _sendEnvelopeStateV2(JsonObject payload);
+  void _handlePacketV2(const uint8_t* buf, size_t len, const IPAddress& from);
+  bool _dispatchCommand(const char* cls, JsonObject payload);
+  bool _ackDuplicate(const char* cid);
+  void _ackCommand(const char* cid, bool ok);
+  bool _idEquals(const char* s) const;
 
   // Hub learn
   void _learnHub(const IPAddress& from, const char* msg_type);
   void _maybeLearnPortFromPing(JsonObject payload);
+  void _learnHubFeatures(JsonObject payload);
   bool _discoverRateReady(unsigned long now) const;
+  void _answerPing(unsigned long now);
+  void _rememberHubSession(JsonObject payload);
+  bool _hubSessionIs(JsonObject payload) const;
   void _makeBootId();
 
   // Crypto
@@ -96,6 +117,13 @@ private:
   bool _decryptIncomingCommand(JsonObject in_wrapper, JsonObject out_plain_obj);
   bool _encryptWrapperState(JsonObject plain, uint64_t ctr, JsonObject out_wrapper_obj);
 
+  bool _acceptCommandCtr(int kid, uint64_t ctr);   // kid + replay/hub-reboot check
+  bool _openCommand(uint64_t ctr, const uint8_t nonce[12],
+                    const uint8_t* ct, size_t ct_len,
+                    const uint8_t tag[16], uint8_t* pt_out);
+  bool _sealState(const uint8_t* pt, size_t pt_len, uint64_t ctr,
+                  uint8_t nonce_out[12], uint8_t* ct_out, uint8_t tag_out[16]);
+
   // Helpers
   static bool _hex32_from_str(const char* s, uint8_t out32[32]);
   static void _u64_le(uint8_t out8[8], uint64_t v);
@@ -131,9 +159,16 @@ private:
 
   bool _hubKnown = false;
   IPAddress _hubIP;
+  bool _hubV2 = false;                  // hub advertised the v2 envelope
 
   unsigned long _lastPongMs = 0;
   unsigned long _lastDiscoverMs = 0;
+
+  // Paced hubs: the session the hub handed us by unicast (we stay quiet on
+  // its "unknown_only" pings), and a ping answer held back by a jitter hint
+  char _hubSession[12] = {0};
+  bool _pingReplyPending = false;
+  unsigned long _pingReplyAtMs = 0;
   uint32_t _seq = 0;
   char _bootId[17] = {0};
 
@@ -147,4 +182,8 @@ private:
   // Counters
   uint64_t _tx_state_ctr = 0;           // device -> HA
   uint64_t _rx_cmd_last_ctr = 0;        // last accepted HA->device command ctr
+
+  // Command acks: last command id seen and its outcome (re-acked on retransmit)
+  char _lastCid[24] = {0};
+  bool _lastCidOk = false;
 };
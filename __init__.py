@@ -3,23 +3,31 @@ from __future__ import annotations
 import logging
 import time
 
+_IMPORT_STARTED = time.perf_counter()
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
 
 from .const import DOMAIN
 from .hub import EtBusHub
+from .metrics import async_setup_metrics
 from .panel import async_setup_panel, async_unload_panel
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[str] = ["light", "switch", "fan", "sensor"]
 
+# Cost of importing the integration (hub, codec, platforms' shared modules)
+_IMPORT_MS = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    t0 = time.perf_counter()
     hub = EtBusHub(hass, entry)
     await hub.async_start()
 
@@ -31,7 +39,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await async_setup_panel(hass)
         hass.data[f"{DOMAIN}_panel_loaded"] = True
 
+    async_setup_metrics(hass)
+
+    t1 = time.perf_counter()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    t2 = time.perf_counter()
+
+    hub.startup_timings.update({
+        "import_ms": _IMPORT_MS,
+        "hub_ms": round((t1 - t0) * 1000, 1),
+        "platforms_ms": round((t2 - t1) * 1000, 1),
+    })
+    _LOGGER.debug(
+        "ET-Bus startup: import=%sms load=%sms crypto=%sms socket=%sms hub=%sms platforms=%sms",
+        _IMPORT_MS,
+        hub.startup_timings.get("load_ms"),
+        hub.startup_timings.get("crypto_ms"),
+        hub.startup_timings.get("socket_ms"),
+        hub.startup_timings["hub_ms"],
+        hub.startup_timings["platforms_ms"],
+    )
+
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     # Register Kate AI command service
     async def handle_kate_command(call):
@@ -55,6 +84,39 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.services.async_register(DOMAIN, "send_kate_command", handle_kate_command)
 
+    # Scene-style bulk commands: [{"id": ..., "class": ..., "payload": {...}}, ...]
+    async def handle_send_bulk(call):
+        commands = call.data.get("commands") or []
+        if not isinstance(commands, list) or not commands:
+            return
+        sent = await hub.async_send_bulk([c for c in commands if isinstance(c, dict)])
+        _LOGGER.debug("ET-Bus: bulk of %d commands sent in %d datagrams", len(commands), sent)
+
+    hass.services.async_register(DOMAIN, "send_bulk", handle_send_bulk)
+
+    return True
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply option changes; crypto changes are applied live, port needs a reload."""
+    hub: EtBusHub | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if hub is None or hub.apply_options(dict(entry.options)):
+        await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_config_entry_device(
+    hass: HomeAssistant, entry: ConfigEntry, device_entry: dr.DeviceEntry
+) -> bool:
+    """Let the user delete a device that is offline; it is not restored again."""
+    hub: EtBusHub | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    if hub is None:
+        return True
+    for domain, dev_id in device_entry.identifiers:
+        if domain != DOMAIN:
+            continue
+        if (hub.devices.get(dev_id) or {}).get("online"):
+            return False
+        hub.forget_device(dev_id)
     return True
 
 
@@ -69,7 +131,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await async_unload_panel(hass)
         hass.data.pop(f"{DOMAIN}_panel_loaded", None)
         hass.services.async_remove(DOMAIN, "send_kate_command")
-
-    return unload_ok
+        hass.services.async_remove(DOMAIN, "send_bulk")
 
     return unload_ok
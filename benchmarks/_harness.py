@@ -0,0 +1,107 @@
+"""Shared setup for the benchmark scripts.
+
+The repository root is the integration itself, so it is registered as the
+"etbus" package. Benchmarks that build a hub need Home Assistant importable
+(a normal HA dev environment); the hub runs on a bare event loop with an
+in-memory Store and a transport that only records datagrams.
+"""
+from __future__ import annotations
+
+import asyncio
+import platform
+import sys
+import time
+import types
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+
+if "etbus" not in sys.modules:
+    _pkg = types.ModuleType("etbus")
+    _pkg.__path__ = [str(ROOT)]
+    sys.modules["etbus"] = _pkg
+
+
+def bench(fn: Callable[[], Any], n: int, repeat: int = 5) -> float:
+    """Best-of-repeat time per call of fn, in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - t)
+    return best / n * 1e6
+
+
+def describe() -> str:
+    parts = [f"CPython {platform.python_version()}"]
+    for mod in ("orjson", "cryptography"):
+        try:
+            parts.append(f"{mod} {__import__(mod).__version__}")
+        except ImportError:
+            parts.append(f"{mod} missing")
+    return ", ".join(parts)
+
+
+class _MemoryStore:
+    def __init__(self, hass: Any, version: int, key: str) -> None:
+        self.data: Any = None
+
+    async def async_load(self) -> Any:
+        return self.data
+
+    async def async_save(self, data: Any) -> None:
+        self.data = data
+
+
+class _Bus:
+    def async_fire(self, event_type: str, data: Any = None) -> None:
+        pass
+
+    def async_listen_once(self, event_type: str, cb: Callable) -> Callable[[], None]:
+        return lambda: None
+
+
+class _Hass:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.bus = _Bus()
+        self.data: dict[str, Any] = {}
+
+    def async_create_task(self, coro: Any, *args: Any, **kwargs: Any) -> asyncio.Task:
+        return self.loop.create_task(coro)
+
+    def async_create_background_task(self, coro: Any, *args: Any, **kwargs: Any) -> asyncio.Task:
+        return self.loop.create_task(coro)
+
+
+class _Entry:
+    def __init__(self, options: dict[str, Any]) -> None:
+        self.entry_id = "bench"
+        self.data: dict[str, Any] = {}
+        self.options = options
+
+    def async_on_unload(self, func: Callable[[], None]) -> None:
+        pass
+
+
+class RecordingTransport:
+    def __init__(self) -> None:
+        self.sent: list[tuple[bytes, tuple[str, int]]] = []
+
+    def sendto(self, data: bytes, addr: tuple[str, int]) -> None:
+        self.sent.append((data, addr))
+
+    def close(self) -> None:
+        pass
+
+
+def make_hub(options: dict[str, Any]) -> Any:
+    """EtBusHub on the running loop, not started, sending into a RecordingTransport."""
+    from etbus import hub as hub_mod
+
+    hub_mod.Store = _MemoryStore
+    hub = hub_mod.EtBusHub(_Hass(asyncio.get_running_loop()), _Entry(options))
+    hub._transport = RecordingTransport()
+    return hub
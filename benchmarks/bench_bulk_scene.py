@@ -0,0 +1,64 @@
+"""Applying a 50-device scene: one send_command per device vs async_send_bulk.
+
+Counts the datagrams and bytes put on the wire and times how long the hub
+takes to emit the whole scene, with and without encryption. Devices
+advertise "bulk" but not "ack", so ack tracking and retransmit timers are
+left out of both sides.
+
+    python benchmarks/bench_bulk_scene.py
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import _harness
+
+DEVICES = [f"relay_{i:02d}" for i in range(50)]
+SCENE = [{"id": d, "class": "switch.relay", "payload": {"on": True}} for d in DEVICES]
+N = 500
+
+
+async def run(crypto: bool) -> None:
+    hub = _harness.make_hub({"crypto_enabled": crypto, "psk_hex": bytes(range(32)).hex()})
+    for i, dev_id in enumerate(DEVICES):
+        hub.devices[dev_id] = {"ip": f"10.0.1.{i + 10}", "features": ["encrypted", "bulk"]}
+    if crypto:
+        await hub._async_ensure_leases(DEVICES)
+    sent = hub._transport.sent
+
+    def before() -> None:
+        for cmd in SCENE:
+            hub.send_command(cmd["id"], cmd["class"], cmd["payload"])
+
+    async def after() -> None:
+        await hub.async_send_bulk(SCENE)
+
+    sent.clear()
+    t = time.perf_counter()
+    for _ in range(N):
+        before()
+    t_before = (time.perf_counter() - t) / N
+    d_before, b_before = len(sent) // N, sum(len(d) for d, _ in sent) // N
+
+    sent.clear()
+    t = time.perf_counter()
+    for _ in range(N):
+        await after()
+    t_after = (time.perf_counter() - t) / N
+    d_after, b_after = len(sent) // N, sum(len(d) for d, _ in sent) // N
+
+    label = "encrypted" if crypto else "plain"
+    print(
+        f"{label:9s} per-device: {d_before:3d} datagrams {b_before:6d} B {t_before * 1e3:6.2f} ms | "
+        f"bulk: {d_after:3d} datagrams {b_after:6d} B {t_after * 1e3:6.2f} ms"
+    )
+
+
+async def main() -> None:
+    print(_harness.describe())
+    await run(crypto=False)
+    await run(crypto=True)
+
+
+asyncio.run(main())
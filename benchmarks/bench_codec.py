@@ -0,0 +1,68 @@
+"""codec loads/dumps vs the stdlib json calls the hub used before.
+
+Envelopes follow what the firmware examples send (RGBLight_Test discover
+and encrypted state) and what the hub sends to them (light.rgb command).
+"before" is json.loads(data.decode()) and json.dumps(..., separators)
+.encode(); an encrypted command serialized its plaintext and then the
+whole envelope again. Needs no Home Assistant.
+
+    python benchmarks/bench_codec.py
+"""
+from __future__ import annotations
+
+import json
+
+import _harness
+from etbus import codec
+
+DISCOVER = (
+    b'{"v":1,"type":"discover","id":"rgb_desk","class":"light.rgb","ts":184233,'
+    b'"payload":{"name":"Desk RGB","fw":"rgb-1.4","lib":"1.9.0","boot":"5f1c2a9e",'
+    b'"features":["encrypted","ack","sync","bulk","paced"],"effects":["none","rainbow","breathe"]}}'
+)
+STATE_ENC = (
+    b'{"v":1,"type":"state","id":"rgb_desk","class":"light.rgb","ts":184911,'
+    b'"payload":{"_enc":1,"kid":1,"ctr":1402,"nonce":"AQAAAHoFAAAAAAAA",'
+    b'"ct":"1mS0pY8b5c2cZs0pN0m2mQ3Ywq7D2v0GdYFh3Jc=","tag":"3h7k0W1Tn2f0vQJm8Zf6xw=="}}'
+)
+HEAD = {"v": 1, "type": "command", "id": "etbus_hub", "class": "light.rgb", "cid": "a1f3"}
+COMMAND = {"on": True, "brightness": 200, "r": 255, "g": 96, "b": 16, "effect": "none"}
+WRAPPER = {
+    "_enc": 1, "kid": 1, "ctr": 1792207133, "nonce": "AAAAAB0b0moAAAAA",
+    "ct": "q1x9cGf0yQm3Z2x8w7pV0d2sYyA1bZr0Lk3fS9Q4n6Uo", "tag": "k9T0b1mZc2Qx8w3pV0d2sY==",
+}
+N = 50000
+
+
+def _json_dumps(obj) -> bytes:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def main() -> None:
+    cases = {
+        "parse discover": (
+            lambda: json.loads(DISCOVER.decode("utf-8", errors="strict")),
+            lambda: codec.loads(memoryview(DISCOVER)),
+        ),
+        "parse encrypted state": (
+            lambda: json.loads(STATE_ENC.decode("utf-8", errors="strict")),
+            lambda: codec.loads(memoryview(STATE_ENC)),
+        ),
+        "build command": (
+            lambda: _json_dumps({**HEAD, "payload": COMMAND}),
+            lambda: codec.envelope(HEAD, codec.dumps(COMMAND)),
+        ),
+        "build encrypted command": (
+            lambda: (_json_dumps(COMMAND), _json_dumps({**HEAD, "payload": WRAPPER})),
+            lambda: (codec.dumps(COMMAND), codec.envelope(HEAD, codec.dumps(WRAPPER))),
+        ),
+    }
+
+    print(_harness.describe())
+    for label, (before, after) in cases.items():
+        b = _harness.bench(before, N)
+        a = _harness.bench(after, N)
+        print(f"{label:24s} {b:6.2f} us -> {a:6.2f} us  ({b / a:.1f}x)")
+
+
+main()
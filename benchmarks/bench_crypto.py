@@ -0,0 +1,59 @@
+"""Per-packet AEAD cost: derive key and build a cipher every time vs the cached cipher.
+
+"before" is what the hub did per packet until the cipher cache:
+sha256(PSK || id) plus a new ChaCha20Poly1305. "after" takes the cipher
+from EtBusHub._aead_for_dev. 50 devices are used round-robin.
+
+    python benchmarks/bench_crypto.py
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+
+import _harness
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+PSK = bytes(range(32))
+DEVICES = [f"relay_{i:02d}" for i in range(50)]
+STATE = b'{"on":true,"brightness":180,"r":255,"g":120,"b":40}'
+N = 20000
+
+
+async def main() -> None:
+    hub = _harness.make_hub({"crypto_enabled": True, "psk_hex": PSK.hex()})
+    nonce = b"\x01\x00\x00\x00" + (7).to_bytes(8, "little")
+    sealed = {
+        d: ChaCha20Poly1305(hashlib.sha256(PSK + d.encode()).digest()).encrypt(nonce, STATE, None)
+        for d in DEVICES
+    }
+
+    def decrypt(aead: ChaCha20Poly1305, d: str) -> None:
+        aead.decrypt(nonce, sealed[d], None)
+
+    def encrypt(aead: ChaCha20Poly1305, d: str) -> None:
+        aead.encrypt(nonce, STATE, None)
+
+    def per_packet(op) -> tuple:
+        devs = itertools.cycle(DEVICES)
+
+        def before() -> None:
+            d = next(devs)
+            op(ChaCha20Poly1305(hashlib.sha256(PSK + d.encode("utf-8")).digest()), d)
+
+        def after() -> None:
+            d = next(devs)
+            op(hub._aead_for_dev(d), d)
+
+        return before, after
+
+    print(_harness.describe())
+    for label, op in (("state decrypt", decrypt), ("command encrypt", encrypt)):
+        before, after = per_packet(op)
+        b = _harness.bench(before, N)
+        a = _harness.bench(after, N)
+        print(f"{label:16s} {b:6.2f} us -> {a:6.2f} us  ({b / a:.1f}x)")
+
+
+asyncio.run(main())
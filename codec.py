@@ -0,0 +1,308 @@
+"""Codecs for the ET-Bus wire formats.
+
+v1 is JSON: orjson is used when it is installed (Home Assistant ships it);
+otherwise the stdlib json module is used. Both produce compact UTF-8 bytes.
+v2 is a compact MessagePack envelope negotiated per device (see below).
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    """Parse a datagram straight from its bytes (no separate decode step)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = str(data, "utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def envelope(head: dict[str, Any], payload: bytes) -> bytes:
+    """Serialize head with already-encoded payload bytes spliced in as "payload"."""
+    return dumps(head)[:-1] + b',"payload":' + payload + b"}"
+
+
+# ── Protocol v2: MessagePack envelope ───────────────────────────────────
+#
+# Same message model as the JSON v1 envelope, encoded as a MessagePack map
+# with small integer keys. Encrypted payloads travel as raw bin fields under
+# V2_SEALED and their plaintext is itself a MessagePack map. Decoded v2
+# messages are normalised to the v1 dict shape (with "_wire": 2) so the rest
+# of the hub does not care which encoding arrived.
+
+WIRE_V2 = 2
+FEATURE_V2 = "v2"
+
+V2_V = 0
+V2_TYPE = 1
+V2_ID = 2
+V2_CLASS = 3
+V2_PAYLOAD = 4
+V2_BOOT = 5
+V2_SEQ = 6
+V2_SEALED = 7
+V2_CID = 8
+
+V2_S_KID = 0
+V2_S_CTR = 1
+V2_S_NONCE = 2
+V2_S_CT = 3
+V2_S_TAG = 4
+
+
+def is_v2(data: bytes | bytearray | memoryview) -> bool:
+    """True when a datagram starts with a fixmap or map16 header (as firmware sends)."""
+    if not data:
+        return False
+    first = data[0]
+    return 0x80 <= first <= 0x8F or first == 0xDE
+
+
+def decode_v2(data: bytes | bytearray | memoryview) -> dict[str, Any] | None:
+    raw = unpackb(data)
+    if not isinstance(raw, dict) or raw.get(V2_V) != WIRE_V2:
+        return None
+
+    msg: dict[str, Any] = {
+        "v": 1,
+        "_wire": WIRE_V2,
+        "type": raw.get(V2_TYPE, ""),
+        "id": raw.get(V2_ID, ""),
+        "class": raw.get(V2_CLASS, ""),
+        "boot": raw.get(V2_BOOT, ""),
+        "seq": raw.get(V2_SEQ, 0),
+    }
+    sealed = raw.get(V2_SEALED)
+    if isinstance(sealed, dict):
+        msg["payload"] = {
+            "_enc": 1,
+            "kid": sealed.get(V2_S_KID, 0),
+            "ctr": sealed.get(V2_S_CTR, 0),
+            "nonce": sealed.get(V2_S_NONCE, b""),
+            "ct": sealed.get(V2_S_CT, b""),
+            "tag": sealed.get(V2_S_TAG, b""),
+        }
+    else:
+        msg["payload"] = raw.get(V2_PAYLOAD) or {}
+    if V2_CID in raw:
+        msg["cid"] = raw[V2_CID]
+    return msg
+
+
+def encode_v2(
+    mtype: str,
+    dev_id: str,
+    dev_class: str,
+    *,
+    payload: dict[str, Any] | None = None,
+    sealed: tuple[int, int, bytes, bytes, bytes] | None = None,
+    cid: str | None = None,
+) -> bytes:
+    """Build a v2 datagram; sealed is (kid, ctr, nonce, ct, tag)."""
+    env: dict[int, Any] = {
+        V2_V: WIRE_V2,
+        V2_TYPE: mtype,
+        V2_ID: dev_id,
+        V2_CLASS: dev_class,
+    }
+    if sealed is not None:
+        kid, ctr, nonce, ct, tag = sealed
+        env[V2_SEALED] = {
+            V2_S_KID: kid,
+            V2_S_CTR: ctr,
+            V2_S_NONCE: nonce,
+            V2_S_CT: ct,
+            V2_S_TAG: tag,
+        }
+    else:
+        env[V2_PAYLOAD] = payload or {}
+    if cid:
+        env[V2_CID] = cid
+    return packb(env)
+
+
+# ── Minimal MessagePack (nil, bool, int, float, str, bin, array, map) ────
+
+
+def packb(obj: Any) -> bytes:
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def _pack(o: Any, out: bytearray) -> None:
+    if o is None:
+        out.append(0xC0)
+    elif o is True:
+        out.append(0xC3)
+    elif o is False:
+        out.append(0xC2)
+    elif isinstance(o, int):
+        if 0 <= o < 0x80:
+            out.append(o)
+        elif -32 <= o < 0:
+            out.append(o & 0xFF)
+        elif 0 <= o <= 0xFF:
+            out += b"\xcc" + o.to_bytes(1, "big")
+        elif 0 <= o <= 0xFFFF:
+            out += b"\xcd" + o.to_bytes(2, "big")
+        elif 0 <= o <= 0xFFFFFFFF:
+            out += b"\xce" + o.to_bytes(4, "big")
+        elif 0 <= o <= 0xFFFFFFFFFFFFFFFF:
+            out += b"\xcf" + o.to_bytes(8, "big")
+        elif -0x80 <= o:
+            out += b"\xd0" + o.to_bytes(1, "big", signed=True)
+        elif -0x8000 <= o:
+            out += b"\xd1" + o.to_bytes(2, "big", signed=True)
+        elif -0x80000000 <= o:
+            out += b"\xd2" + o.to_bytes(4, "big", signed=True)
+        elif -0x8000000000000000 <= o:
+            out += b"\xd3" + o.to_bytes(8, "big", signed=True)
+        else:
+            raise ValueError("integer out of MessagePack range")
+    elif isinstance(o, float):
+        out += b"\xcb" + struct.pack(">d", o)
+    elif isinstance(o, str):
+        b = o.encode("utf-8")
+        n = len(b)
+        if n < 32:
+            out.append(0xA0 | n)
+        elif n <= 0xFF:
+            out += b"\xd9" + n.to_bytes(1, "big")
+        elif n <= 0xFFFF:
+            out += b"\xda" + n.to_bytes(2, "big")
+        else:
+            out += b"\xdb" + n.to_bytes(4, "big")
+        out += b
+    elif isinstance(o, (bytes, bytearray, memoryview)):
+        n = len(o)
+        if n <= 0xFF:
+            out += b"\xc4" + n.to_bytes(1, "big")
+        elif n <= 0xFFFF:
+            out += b"\xc5" + n.to_bytes(2, "big")
+        else:
+            out += b"\xc6" + n.to_bytes(4, "big")
+        out += o
+    elif isinstance(o, (list, tuple)):
+        n = len(o)
+        if n < 16:
+            out.append(0x90 | n)
+        elif n <= 0xFFFF:
+            out += b"\xdc" + n.to_bytes(2, "big")
+        else:
+            out += b"\xdd" + n.to_bytes(4, "big")
+        for item in o:
+            _pack(item, out)
+    elif isinstance(o, dict):
+        n = len(o)
+        if n < 16:
+            out.append(0x80 | n)
+        elif n <= 0xFFFF:
+            out += b"\xde" + n.to_bytes(2, "big")
+        else:
+            out += b"\xdf" + n.to_bytes(4, "big")
+        for k, v in o.items():
+            _pack(k, out)
+            _pack(v, out)
+    else:
+        raise TypeError(f"cannot pack {type(o).__name__}")
+
+
+def unpackb(data: bytes | bytearray | memoryview) -> Any:
+    buf = bytes(data)
+    obj, pos = _unpack(buf, 0, 0)
+    if pos != len(buf):
+        raise ValueError("trailing bytes after MessagePack object")
+    return obj
+
+
+_MAX_DEPTH = 16
+
+
+def _unpack(b: bytes, i: int, depth: int) -> tuple[Any, int]:
+    if depth > _MAX_DEPTH:
+        raise ValueError("MessagePack nesting too deep")
+    t = b[i]
+    i += 1
+    if t < 0x80:
+        return t, i
+    if t >= 0xE0:
+        return t - 0x100, i
+    if 0xA0 <= t <= 0xBF:
+        return _take_str(b, i, t & 0x1F)
+    if 0x90 <= t <= 0x9F:
+        return _take_array(b, i, t & 0x0F, depth)
+    if 0x80 <= t <= 0x8F:
+        return _take_map(b, i, t & 0x0F, depth)
+    if t == 0xC0:
+        return None, i
+    if t == 0xC2:
+        return False, i
+    if t == 0xC3:
+        return True, i
+    if t in (0xCC, 0xCD, 0xCE, 0xCF):
+        n = 1 << (t - 0xCC)
+        return int.from_bytes(_need(b, i, n), "big"), i + n
+    if t in (0xD0, 0xD1, 0xD2, 0xD3):
+        n = 1 << (t - 0xD0)
+        return int.from_bytes(_need(b, i, n), "big", signed=True), i + n
+    if t == 0xCA:
+        return struct.unpack(">f", _need(b, i, 4))[0], i + 4
+    if t == 0xCB:
+        return struct.unpack(">d", _need(b, i, 8))[0], i + 8
+    if t in (0xD9, 0xDA, 0xDB):
+        n = 1 << (t - 0xD9)
+        return _take_str(b, i + n, int.from_bytes(_need(b, i, n), "big"))
+    if t in (0xC4, 0xC5, 0xC6):
+        n = 1 << (t - 0xC4)
+        size = int.from_bytes(_need(b, i, n), "big")
+        i += n
+        return _need(b, i, size), i + size
+    if t in (0xDC, 0xDD):
+        n = 2 if t == 0xDC else 4
+        return _take_array(b, i + n, int.from_bytes(_need(b, i, n), "big"), depth)
+    if t in (0xDE, 0xDF):
+        n = 2 if t == 0xDE else 4
+        return _take_map(b, i + n, int.from_bytes(_need(b, i, n), "big"), depth)
+    raise ValueError(f"unsupported MessagePack type 0x{t:02x}")
+
+
+def _need(b: bytes, i: int, n: int) -> bytes:
+    if i + n > len(b):
+        raise ValueError("truncated MessagePack data")
+    return b[i:i + n]
+
+
+def _take_str(b: bytes, i: int, n: int) -> tuple[str, int]:
+    return _need(b, i, n).decode("utf-8"), i + n
+
+
+def _take_array(b: bytes, i: int, n: int, depth: int) -> tuple[list[Any], int]:
+    out = []
+    for _ in range(n):
+        v, i = _unpack(b, i, depth + 1)
+        out.append(v)
+    return out, i
+
+
+def _take_map(b: bytes, i: int, n: int, depth: int) -> tuple[dict[Any, Any], int]:
+    out = {}
+    for _ in range(n):
+        k, i = _unpack(b, i, depth + 1)
+        v, i = _unpack(b, i, depth + 1)
+        out[k] = v
+    return out, i
@@ -12,7 +12,19 @@ from .const import (
     CONF_PORT,
     CONF_CRYPTO_ENABLED,
     CONF_PSK_HEX,
+    CONF_SAVE_DELAY,
+    CONF_COMMAND_INTERVAL,
+    CONF_LATENCY_SENSORS,
+    CONF_MESSAGE_RATE_MAX,
+    CONF_SENSOR_FILTERS,
+    CONF_RESYNC_WINDOW,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_COMMAND_INTERVAL,
+    DEFAULT_MESSAGE_RATE_MAX,
+    DEFAULT_RESYNC_WINDOW,
+    PING_INTERVAL,
 )
+from .sensor_filters import parse_sensor_filters
 
 
 def _normalize_hex(s: str) -> str:
@@ -30,6 +42,13 @@ def _validate_and_normalize_options(user_input: dict) -> dict:
     if crypto_on and len(psk) != 64:
         raise vol.Invalid("psk_hex must be exactly 64 hex chars (32 bytes) when crypto is enabled")
 
+    filters = str(out.get(CONF_SENSOR_FILTERS, "") or "").strip()
+    try:
+        parse_sensor_filters(filters)
+    except ValueError as e:
+        raise vol.Invalid(str(e), path=[CONF_SENSOR_FILTERS]) from e
+    out[CONF_SENSOR_FILTERS] = filters
+
     return out
 
 
@@ -59,14 +78,31 @@ class EtBusOptionsFlowHandler(config_entries.OptionsFlow):
             try:
                 fixed = _validate_and_normalize_options(user_input)
                 return self.async_create_entry(title="", data=fixed)
-            except vol.Invalid:
-                errors["base"] = "invalid_psk"
+            except vol.Invalid as e:
+                if e.path:
+                    errors[str(e.path[0])] = "invalid_sensor_filters"
+                else:
+                    errors["base"] = "invalid_psk"
 
         schema = vol.Schema(
             {
                 vol.Required(CONF_PORT, default=opts.get(CONF_PORT, DEFAULT_PORT)): vol.Coerce(int),
                 vol.Required(CONF_CRYPTO_ENABLED, default=opts.get(CONF_CRYPTO_ENABLED, False)): bool,
                 vol.Optional(CONF_PSK_HEX, default=str(opts.get(CONF_PSK_HEX, ""))): str,
+                vol.Optional(CONF_SAVE_DELAY, default=opts.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)): vol.All(
+                    vol.Coerce(float), vol.Range(min=0.5, max=600)
+                ),
+                vol.Optional(
+                    CONF_COMMAND_INTERVAL, default=opts.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=5)),
+                vol.Optional(CONF_LATENCY_SENSORS, default=opts.get(CONF_LATENCY_SENSORS, False)): bool,
+                vol.Optional(
+                    CONF_MESSAGE_RATE_MAX, default=opts.get(CONF_MESSAGE_RATE_MAX, DEFAULT_MESSAGE_RATE_MAX)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1000)),
+                vol.Optional(CONF_SENSOR_FILTERS, default=str(opts.get(CONF_SENSOR_FILTERS, ""))): str,
+                vol.Optional(
+                    CONF_RESYNC_WINDOW, default=opts.get(CONF_RESYNC_WINDOW, DEFAULT_RESYNC_WINDOW)
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=PING_INTERVAL)),
             }
         )
         return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
@@ -11,5 +11,16 @@ OFFLINE_TIMEOUT = 95        # seconds
 CONF_PORT = "port"
 CONF_CRYPTO_ENABLED = "crypto_enabled"
 CONF_PSK_HEX = "psk_hex"
+CONF_SAVE_DELAY = "save_delay"
+CONF_COMMAND_INTERVAL = "command_interval"
+CONF_LATENCY_SENSORS = "latency_sensors"
+CONF_MESSAGE_RATE_MAX = "message_rate_max"
+CONF_SENSOR_FILTERS = "sensor_filters"
+CONF_RESYNC_WINDOW = "resync_window"
+
+DEFAULT_SAVE_DELAY = 10     # seconds a dirty store may stay unsaved
+DEFAULT_COMMAND_INTERVAL = 0.1  # min seconds between coalesced commands per device/class
+DEFAULT_MESSAGE_RATE_MAX = 50   # etbus_message events per second (0 = no cap)
+DEFAULT_RESYNC_WINDOW = 5.0     # seconds each resync round is spread over
 
 ETBUS_KID = 1
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PSK_HEX, DOMAIN
+from .hub import EtBusHub
+
+TO_REDACT = {CONF_PSK_HEX}
+
+_DEVICE_KEYS = ("ip", "online", "lib", "features", "boot", "seq")
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
+    now = time.time()
+
+    devices: dict[str, Any] = {}
+    for dev_id, info in hub.devices.items():
+        d = {k: info[k] for k in _DEVICE_KEYS if k in info}
+        last = info.get("last_seen")
+        if last:
+            d["last_seen_age_s"] = round(now - float(last), 1)
+        devices[dev_id] = d
+
+    return {
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "devices": devices,
+        "latency": hub.latency_stats(),
+        "commands": hub.command_stats(),
+        "persistence": hub.persistence_stats(),
+        "pipeline": hub.pipeline_stats(),
+        "listeners": hub.listener_stats(),
+        "liveness": hub.liveness_stats(),
+        "startup": dict(hub.startup_timings),
+    }
@@ -18,6 +18,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
     entities: dict[tuple[str, str], EtBusFan] = {}
 
+    # Fans seen before the restart are added at once from the cache
+    for dev_id, dev_class, desc in hub.known_devices("fan."):
+        if dev_class not in ("fan.speed", "fan.preset"):
+            continue
+        endpoint = dev_class.replace(".", "_")
+        saved = hub.get_last_reported_state(dev_id)
+        if saved and saved.get("dev_class") != dev_class:
+            saved = None
+        entities[(dev_id, endpoint)] = EtBusFan(
+            hub, dev_id, dev_class, endpoint, desc.get("name", dev_id), saved, restored=True
+        )
+    if entities:
+        async_add_entities(list(entities.values()))
+        _LOGGER.debug("ET-Bus: restored %d fans from discovery cache", len(entities))
+
     @callback
     def handle_message(msg: dict[str, Any]) -> None:
         if msg.get("v") != 1:
@@ -48,8 +63,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             # Always update HA entity from device-reported state
             if mtype == "state":
                 entities[key].handle_state(payload)
+            else:
+                entities[key].confirm()
 
-    hub.register_listener(handle_message)
+    entry.async_on_unload(
+        hub.register_listener(handle_message, class_prefix="fan.", msg_types=("discover", "state", "pong"), name="fan")
+    )
 
 
 class EtBusFan(FanEntity):
@@ -64,12 +83,15 @@ class EtBusFan(FanEntity):
         endpoint: str,
         name: str,
         saved_state: dict[str, Any] | None = None,
+        restored: bool = False,
     ):
         self._hub = hub
         self._dev_id = dev_id
         self._dev_class = dev_class
         self._endpoint = endpoint
         self._attr_name = name
+        # Speed/preset stay assumed until this fan answers
+        self._attr_assumed_state = restored
 
         self._is_on = False
         self._percentage = 0
@@ -96,8 +118,7 @@ class EtBusFan(FanEntity):
 
     @property
     def available(self) -> bool:
-        info = self._hub.devices.get(self._dev_id) or {}
-        return bool(info.get("online", True))
+        return self._hub.device_available(self._dev_id)
 
     @property
     def supported_features(self) -> FanEntityFeature:
@@ -137,11 +158,20 @@ class EtBusFan(FanEntity):
 
     def handle_state(self, payload: dict[str, Any]) -> None:
         """Update entity from device-reported state."""
+        self._attr_assumed_state = False
         self._apply_payload(payload)
 
         if self.hass is not None:
             self.async_write_ha_state()
 
+    def confirm(self) -> None:
+        """The device answered: drop the assumed flag from a restored entity."""
+        if not self._attr_assumed_state:
+            return
+        self._attr_assumed_state = False
+        if self.hass is not None:
+            self.async_write_ha_state()
+
     # -------------------
     # HA → device (only when user explicitly acts)
     # -------------------
@@ -183,4 +213,4 @@ class EtBusFan(FanEntity):
         else:
             payload["preset"] = self._preset
 
-        self._hub.send_command(self._dev_id, self._dev_class, payload)
+        self._hub.send_command(self._dev_id, self._dev_class, payload, coalesce=True)
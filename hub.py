@@ -3,23 +3,37 @@ from __future__ import annotations
 import asyncio
 import base64
 import hashlib
-import json
+import heapq
 import logging
+import math
+import secrets
 import socket
 import time
-from typing import Any, Callable
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.storage import Store
 
+from . import codec
 from .const import (
+    CONF_COMMAND_INTERVAL,
     CONF_CRYPTO_ENABLED,
+    CONF_LATENCY_SENSORS,
+    CONF_MESSAGE_RATE_MAX,
     CONF_PORT,
     CONF_PSK_HEX,
+    CONF_RESYNC_WINDOW,
+    CONF_SAVE_DELAY,
+    DEFAULT_COMMAND_INTERVAL,
     DEFAULT_HOST_MCAST,
+    DEFAULT_MESSAGE_RATE_MAX,
     DEFAULT_PORT,
+    DEFAULT_RESYNC_WINDOW,
+    DEFAULT_SAVE_DELAY,
     ETBUS_KID,
     OFFLINE_TIMEOUT,
     PING_INTERVAL,
@@ -31,11 +45,87 @@ STORAGE_KEY = "etbus_last_commands"
 STORAGE_VERSION = 1
 STORAGE_KEY_DEVICE_STATE = "etbus_device_states"
 STORAGE_KEY_TX_CTR = "etbus_tx_counters"
-
-try:
-    from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
-except Exception:  # pragma: no cover
-    ChaCha20Poly1305 = None
+STORAGE_KEY_DISCOVERY = "etbus_discovery"
+
+# Payload fields kept in the discovery cache (plus "switches" when it is
+# the discovery-format list, and the key set / scalar-valued keys of state
+# messages as "keys" / "metrics")
+DISCOVERY_FIELDS = ("name", "model", "version", "effects", "unit", "units")
+DISCOVERY_MAX_AGE_DAYS = 30  # cached devices not heard for this long are dropped at load
+
+RX_BUFFER_SIZE = 8192       # largest datagram we accept
+RX_DRAIN_MAX = 256          # datagrams drained per readiness event
+RX_DEDUPE_WINDOW = 1.0      # seconds a byte-identical repeat is dropped
+RX_DEDUPE_MAX = 512         # datagram digests per generation (two are kept)
+RX_OWN_MAX = 64             # recent own multicast sends remembered
+
+AEAD_CACHE_MAX = 1024       # per-device ciphers kept warm
+TX_CTR_LEASE_BLOCK = 1024   # command counters reserved per persisted write
+
+REPLAY_WINDOW = 128         # state counters tracked behind the highest seen
+REPLAY_MASK = (1 << REPLAY_WINDOW) - 1
+REPLAY_RESET_CTR = 30       # a counter this low ...
+REPLAY_RESET_GAP = 50       # ... this far below the highest seen is a restart
+
+BULK_FRAME_MAX = 1200       # bytes per multicast bulk frame (below Wi-Fi MTU)
+BULK_MAX_SECTIONS = 12      # sections per frame (bounds the ESP JSON document)
+FEATURE_BULK = "bulk"
+
+CMD_RTO_INITIAL = 0.5       # retransmit timeout before any RTT sample (s)
+CMD_RTO_MIN = 0.1
+CMD_RTO_MAX = 4.0
+CMD_MAX_ATTEMPTS = 5        # first send + retransmits
+FEATURE_ACK = "ack"
+
+# Liveness: a device goes offline LIVENESS_MISSES pong gaps plus LIVENESS_K
+# jitters after it was last heard, clamped to [LIVENESS_TIMEOUT_MIN,
+# OFFLINE_TIMEOUT]; OFFLINE_TIMEOUT applies until its cadence is known
+LIVENESS_K = 4.0
+LIVENESS_MISSES = 2         # one lost pong is not an outage
+LIVENESS_MIN_SAMPLES = 3    # pong gaps observed before adapting
+LIVENESS_GAP_MIN = 1.0      # closer pongs (answers to back-to-back pings) are not a cadence
+LIVENESS_TIMEOUT_MIN = 5.0
+
+# Passive liveness: any packet proves a device alive. Each PING_INTERVAL
+# round only devices silent for LIVENESS_PROBE_AFTER pong gaps get a unicast
+# probe, spread over resync_window in RESYNC_SLOT steps. Devices advertising
+# FEATURE_PACED get one unicast "sync" carrying the hub session when first
+# heard, after which they ignore "unknown_only" multicast pings from this
+# session; that ping backs off from PING_INTERVAL to PING_INTERVAL_MAX while
+# the fleet is unchanged, and its answers are spread by a jitter hint.
+FEATURE_PACED = "paced"
+RESYNC_SLOT = 0.02
+LIVENESS_PROBE_AFTER = 1.5
+PING_INTERVAL_MAX = 160.0
+
+LISTENER_BUDGET = 0.010         # seconds one listener call may take before it counts as slow
+LISTENER_WARN_INTERVAL = 60.0   # min seconds between slow warnings per listener
+
+EVENT_MESSAGE = "etbus_message"
+EVENT_DEVICE_STATUS = "etbus_device_status"
+MESSAGE_LISTENER_CHECK = 1.0    # seconds between event-bus subscriber lookups
+
+LATENCY_MAX = 10.0          # replies later than this (s) are not matched to a command
+LATENCY_BUCKET_MIN_MS = 0.25
+LATENCY_BUCKETS_PER_OCTAVE = 4
+LATENCY_BUCKETS = 72        # 0.25 ms .. ~65 s, ~19% bucket width
+
+STARTUP_PING_DELAY = 2.0    # seconds after start before the startup ping (platforms are up by then)
+
+# ChaCha20Poly1305, imported the first time crypto is enabled (False if missing)
+_AEAD_CLASS: Any = None
+
+
+def _aead_class() -> Any | None:
+    global _AEAD_CLASS
+    if _AEAD_CLASS is None:
+        try:
+            from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+        except Exception:  # pragma: no cover
+            _AEAD_CLASS = False
+        else:
+            _AEAD_CLASS = ChaCha20Poly1305
+    return _AEAD_CLASS or None
 
 
 def _now() -> float:
@@ -54,10 +144,6 @@ def _hex32_to_bytes(psk_hex: str) -> bytes | None:
         return None
 
 
-def _b64e(b: bytes) -> str:
-    return base64.b64encode(b).decode("ascii")
-
-
 def _b64d(s: str) -> bytes:
     return base64.b64decode(s.encode("ascii"))
 
@@ -66,6 +152,448 @@ def _u64_le(n: int) -> bytes:
     return int(n).to_bytes(8, "little", signed=False)
 
 
+class _ListenerStats:
+    """Call timing for one named listener (shared by routes with that name)."""
+
+    __slots__ = ("calls", "errors", "total", "max", "ewma", "slow", "last_warn")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.ewma = 0.0
+        self.slow = 0
+        self.last_warn = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 4) if self.calls else None,
+            "ewma_ms": round(self.ewma * 1000, 4),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+@dataclass
+class _Route:
+    """One router subscription; None filters match anything."""
+
+    cb: Callable[[dict[str, Any]], None]
+    dev_id: str | None
+    class_prefix: str | None
+    msg_types: tuple[str, ...] | None
+    name: str
+    stats: _ListenerStats
+
+
+class _CoalescedStore:
+    """Store wrapper with dirty tracking and one delayed write per burst.
+
+    The first mark_dirty() arms a timer of max_staleness seconds; further
+    marks before it fires are folded into that single write. on_saved, if
+    given, receives each snapshot once it is on disk.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        key: str,
+        data_func: Callable[[], Any],
+        max_staleness: float,
+        on_saved: Callable[[Any], None] | None = None,
+    ) -> None:
+        self._hass = hass
+        self._key = key
+        self._store = Store(hass, STORAGE_VERSION, key)
+        self._data_func = data_func
+        self._on_saved = on_saved
+        self.max_staleness = float(max_staleness)
+        self._dirty = False
+        self._timer: asyncio.TimerHandle | None = None
+        self._lock = asyncio.Lock()
+        self.writes = 0
+        self.coalesced = 0
+
+    async def async_load(self) -> Any:
+        return await self._store.async_load()
+
+    def mark_dirty(self) -> None:
+        if self._dirty:
+            self.coalesced += 1
+            return
+        self._dirty = True
+        self._timer = self._hass.loop.call_later(self.max_staleness, self._on_timer)
+
+    def flush_soon(self) -> None:
+        """Mark dirty and write on the next loop iteration."""
+        self.mark_dirty()
+        self._hass.async_create_task(self.async_flush())
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._hass.async_create_task(self.async_flush())
+
+    async def async_flush(self) -> None:
+        """Write now if anything is pending; returns once no write is in flight.
+
+        A failed write leaves the store dirty with the timer re-armed, so it
+        is retried after max_staleness (or by the next flush).
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+            self.writes += 1
+            data = self._data_func()
+            try:
+                await self._store.async_save(data)
+            except Exception:
+                _LOGGER.exception("ET-Bus: failed to persist %s", self._key)
+                self.mark_dirty()
+                return
+            if self._on_saved is not None:
+                self._on_saved(data)
+
+    def stats(self) -> dict[str, Any]:
+        return {"writes": self.writes, "coalesced": self.coalesced, "dirty": self._dirty}
+
+
+class _TxCounterLease:
+    """HA->device command counters handed out from persisted reservations.
+
+    Only the reserved high-water mark of each device is stored. On load every
+    device resumes above its stored mark, so whatever was left of a block in
+    use when HA stopped (or crashed) is skipped, never reused. The next block
+    is reserved once half of the current one is spent, so its write is on
+    disk long before the counters in it are needed. Counters are only handed
+    out up to the mark last confirmed on disk (persisted()), so a device's
+    first block, or a renewal whose write is late, is never used unsaved.
+    """
+
+    def __init__(self, block: int = TX_CTR_LEASE_BLOCK) -> None:
+        self.block = int(block)
+        self._next: dict[str, int] = {}
+        self._limit: dict[str, int] = {}
+        self._durable: dict[str, int] = {}
+
+    def load(self, marks: dict[str, int]) -> None:
+        """Resume from stored marks; nothing is handed out until marks() is persisted."""
+        self._next = {d: int(m) + 1 for d, m in marks.items()}
+        self._limit = {d: int(m) + self.block for d, m in marks.items()}
+        self._durable = {}
+
+    def marks(self) -> dict[str, int]:
+        return dict(self._limit)
+
+    def persisted(self, marks: dict[str, int]) -> None:
+        """Record a marks() snapshot that is now on disk."""
+        for dev_id, mark in marks.items():
+            if mark > self._durable.get(dev_id, -1):
+                self._durable[dev_id] = mark
+
+    def ready(self, dev_id: str) -> bool:
+        """True if next() can hand out a counter for the device right now."""
+        ctr = self._next.get(dev_id)
+        return ctr is not None and ctr <= self._durable.get(dev_id, -1)
+
+    def reserve(self, dev_id: str, seed: int) -> bool:
+        """Reserve a first block starting at seed; True if marks() changed."""
+        if dev_id in self._next:
+            return False
+        self._next[dev_id] = int(seed)
+        self._limit[dev_id] = int(seed) + self.block
+        return True
+
+    def next(self, dev_id: str) -> tuple[int | None, bool]:
+        """Return (ctr, renewed); renewed means marks() must be persisted now.
+
+        ctr is None while the device has no reservation on disk covering it.
+        """
+        if not self.ready(dev_id):
+            return None, False
+        ctr = self._next[dev_id]
+        self._next[dev_id] = ctr + 1
+
+        limit = self._limit[dev_id]
+        if limit - ctr < self.block // 2:
+            self._limit[dev_id] = limit + self.block
+            return ctr, True
+        return ctr, False
+
+
+class _ReplayWindow:
+    """Sliding anti-replay window over one device's state counters.
+
+    Bit i of the bitmap is set once counter top - i has been accepted, so
+    late copies inside the window still get through exactly once. check()
+    runs before decryption; commit() only after the payload authenticated.
+    """
+
+    __slots__ = ("top", "bitmap")
+
+    def __init__(self) -> None:
+        self.top = 0
+        self.bitmap = 0
+
+    def check(self, ctr: int) -> str | None:
+        """Drop reason for ctr ("duplicate" / "replay"), None if acceptable."""
+        if ctr > self.top:
+            return None
+        offset = self.top - ctr
+        if offset >= REPLAY_WINDOW:
+            return "replay"
+        return "duplicate" if (self.bitmap >> offset) & 1 else None
+
+    def is_restart(self, ctr: int) -> bool:
+        """Reset rule: a device that restarted counts again from zero.
+
+        Devices that report a boot id are reset on boot change instead;
+        this covers older firmware and counters restarted by a new key.
+        """
+        return ctr < REPLAY_RESET_CTR and self.top - ctr >= REPLAY_RESET_GAP
+
+    def commit(self, ctr: int) -> None:
+        if ctr > self.top:
+            shift = ctr - self.top
+            if shift < REPLAY_WINDOW:
+                self.bitmap = ((self.bitmap << shift) | 1) & REPLAY_MASK
+            else:
+                self.bitmap = 1
+            self.top = ctr
+        else:
+            self.bitmap |= 1 << (self.top - ctr)
+
+    def reset(self) -> None:
+        self.top = 0
+        self.bitmap = 0
+
+
+@dataclass
+class CommandResult:
+    """Outcome of a command sent through the hub.
+
+    status is "acked" (device ran it), "rejected" (device acked ok=false,
+    e.g. decrypt failure), "timeout", "superseded" (a newer command to the
+    same device replaced it), "cancelled" (hub stopped), "unacked" (device
+    does not support acks; sent once) or "unsent" (nothing went out: no IP
+    known for the device or the command could not be encoded/encrypted).
+    """
+
+    dev_id: str
+    status: str
+    attempts: int = 0
+    rtt: float | None = None
+
+    @property
+    def delivered(self) -> bool:
+        return self.status in ("acked", "rejected")
+
+
+class _RttEstimator:
+    """Smoothed RTT and retransmit timeout per device (Jacobson/Karels)."""
+
+    __slots__ = ("srtt", "rttvar", "rto")
+
+    def __init__(self) -> None:
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.rto = CMD_RTO_INITIAL
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.rto = min(max(self.srtt + 4 * self.rttvar, CMD_RTO_MIN), CMD_RTO_MAX)
+
+    def backoff(self) -> None:
+        # Kept until the next valid sample, as in RFC 6298
+        self.rto = min(self.rto * 2, CMD_RTO_MAX)
+
+
+@dataclass
+class _PendingCommand:
+    cid: str
+    dev_id: str
+    data: bytes
+    future: asyncio.Future
+    sent_ts: float
+    attempts: int = 1
+    timer: asyncio.TimerHandle | None = None
+
+
+class _LatencyHistogram:
+    """Fixed log-bucket histogram of round-trip times (bounded memory)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * LATENCY_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        if ms <= LATENCY_BUCKET_MIN_MS:
+            i = 0
+        else:
+            i = min(
+                int(math.log2(ms / LATENCY_BUCKET_MIN_MS) * LATENCY_BUCKETS_PER_OCTAVE),
+                LATENCY_BUCKETS - 1,
+            )
+        self.counts[i] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> float | None:
+        """Geometric middle of the bucket holding the q-quantile, in ms."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                mid = LATENCY_BUCKET_MIN_MS * 2 ** ((i + 0.5) / LATENCY_BUCKETS_PER_OCTAVE)
+                return round(min(mid, self.max), 2)
+        return round(self.max, 2)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max, 2) if self.count else None,
+        }
+
+
+@dataclass
+class _WriteBehind:
+    """Coalescing slot for one (device, class): latest payload wins."""
+
+    pending: tuple[dict[str, Any], bool] | None = None  # (payload, store_last)
+    timer: asyncio.TimerHandle | None = None
+
+
+class _Liveness:
+    """One device's offline deadline, adapted to the gaps between its pongs.
+
+    Gap mean and jitter are smoothed like an RTT estimator (RFC 6298 gains).
+    queued_at is the deadline of this device's live heap entry, if any.
+    """
+
+    __slots__ = ("heard", "last_pong", "gap", "jitter", "samples", "timeout", "deadline", "queued_at")
+
+    def __init__(self) -> None:
+        self.heard = 0.0
+        self.last_pong: float | None = None
+        self.gap = 0.0
+        self.jitter = 0.0
+        self.samples = 0
+        self.timeout = float(OFFLINE_TIMEOUT)
+        self.deadline = 0.0
+        self.queued_at: float | None = None
+
+    def pong(self, now: float) -> None:
+        last, self.last_pong = self.last_pong, now
+        if last is None or now - last < LIVENESS_GAP_MIN:
+            return
+        sample = now - last
+        if self.samples == 0:
+            self.gap = sample
+            self.jitter = sample / 2
+        else:
+            err = sample - self.gap
+            self.gap += err / 8
+            self.jitter += (abs(err) - self.jitter) / 4
+        self.samples += 1
+        if self.samples >= LIVENESS_MIN_SAMPLES:
+            timeout = LIVENESS_MISSES * self.gap + LIVENESS_K * self.jitter
+            self.timeout = min(max(timeout, LIVENESS_TIMEOUT_MIN), float(OFFLINE_TIMEOUT))
+
+    def quiet(self, now: float) -> bool:
+        """Silent for longer than its usual pong gap allows."""
+        gap = self.gap if self.samples >= LIVENESS_MIN_SAMPLES else float(PING_INTERVAL)
+        return now - self.heard > LIVENESS_PROBE_AFTER * gap
+
+
+class _DatagramFilter:
+    """Pre-parse filter for our own multicast echoes and repeated datagrams.
+
+    Datagrams are keyed by an 8-byte BLAKE2b digest of their raw bytes,
+    taken straight from the receive buffer without copying it. Copies of
+    what the hub itself sent to the group, and byte-identical repeats from
+    the same source (unicast + multicast copies, Wi-Fi retries) within
+    RX_DEDUPE_WINDOW, are dropped before any decoding or crypto. Recent
+    digests live in two generations of RX_DEDUPE_MAX entries; the older one
+    is discarded wholesale, so there is no per-packet eviction.
+    """
+
+    __slots__ = ("_cur", "_prev", "_own")
+
+    def __init__(self) -> None:
+        self._cur: dict[tuple[bytes, str], float] = {}
+        self._prev: dict[tuple[bytes, str], float] = {}
+        self._own: dict[bytes, float] = {}
+
+    def sent(self, data: bytes | memoryview, now: float) -> None:
+        """Remember a datagram the hub sent to the multicast group."""
+        if len(self._own) >= RX_OWN_MAX:
+            # Echoes come back within milliseconds; the oldest send can go
+            del self._own[next(iter(self._own))]
+        self._own[hashlib.blake2b(data, digest_size=8).digest()] = now
+
+    def check(self, data: bytes | memoryview, src_ip: str, now: float) -> str | None:
+        """Drop reason for this datagram, None when it should be parsed."""
+        h = hashlib.blake2b(data, digest_size=8).digest()
+        if self._own:
+            ts = self._own.get(h)
+            if ts is not None and now - ts < RX_DEDUPE_WINDOW:
+                return "own_echo"
+
+        key = (h, src_ip)
+        ts = self._cur.get(key)
+        if ts is None:
+            ts = self._prev.get(key)
+        if ts is not None and now - ts < RX_DEDUPE_WINDOW:
+            return "duplicate_datagram"
+        self._cur[key] = now
+        if len(self._cur) >= RX_DEDUPE_MAX:
+            self._prev = self._cur
+            self._cur = {}
+        return None
+
+
+class _EtBusDatagramProtocol(asyncio.DatagramProtocol):
+    """Hands datagrams from the event loop transport to the hub RX batcher."""
+
+    def __init__(self, hub: EtBusHub) -> None:
+        self._hub = hub
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        self._hub._rx_enqueue(data, addr[0])
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug("ET-Bus UDP error: %r", exc)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if exc is not None:
+            _LOGGER.debug("ET-Bus UDP transport lost: %r", exc)
+
+
 class EtBusHub:
     """ET-Bus hub (NO MAC mode): key = sha256(PSK || device_id), AAD=None"""
 
@@ -75,79 +603,310 @@ class EtBusHub:
 
         opts = dict(entry.options)
         self.port: int = int(opts.get(CONF_PORT, DEFAULT_PORT))
-        self.crypto_enabled: bool = bool(opts.get(CONF_CRYPTO_ENABLED, False))
-        self.psk_hex: str = str(opts.get(CONF_PSK_HEX, "") or "")
-        self.master_secret: bytes | None = _hex32_to_bytes(self.psk_hex)
+        self.crypto_enabled: bool = False
+        self.psk_hex: str = ""
+        self.master_secret: bytes | None = None
+        self.kid: int = int(ETBUS_KID)
 
-        if self.crypto_enabled and (ChaCha20Poly1305 is None):
-            _LOGGER.error("ET-Bus crypto enabled but cryptography is missing")
-            self.crypto_enabled = False
+        # (dev_id, kid) -> ready ChaCha20Poly1305 built from the derived key
+        self._aead_cache: OrderedDict[tuple[str, int], Any] = OrderedDict()
 
-        if self.crypto_enabled and not self.master_secret:
-            _LOGGER.error("ET-Bus crypto enabled but psk_hex is invalid (needs 64 hex chars)")
-            self.crypto_enabled = False
+        self._apply_crypto_options(opts)
 
         self.hub_id: str = "hub"
 
         self.devices: dict[str, dict[str, Any]] = {}
-        self._listeners: list[Callable[[dict[str, Any]], None]] = []
+        # dev_id -> msg type -> routes (None keys are wildcards). Buckets are
+        # tuples rebuilt on (un)subscribe so dispatch never copies.
+        self._routes: dict[str | None, dict[str | None, tuple[_Route, ...]]] = {}
+        self._listener_stats: dict[str, _ListenerStats] = {}
 
         self._sock: socket.socket | None = None
-        self._task: asyncio.Task | None = None
+        self._transport: asyncio.DatagramTransport | None = None
         self._ping_task: asyncio.Task | None = None
+        self._startup_task: asyncio.Task | None = None
+        self.startup_timings: dict[str, float] = {}
+
+        self._unsub_stop: Callable[[], None] | None = None
+
+        # Persistence is dirty-tracked; writes are delayed and coalesced
+        save_delay = float(opts.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY))
 
         # last command per device — persisted to disk for reference
         self._last_command: dict[str, dict[str, Any]] = {}
-        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._store = _CoalescedStore(hass, STORAGE_KEY, lambda: dict(self._last_command), save_delay)
 
         # last REPORTED state from each device — persisted so HA entities
         # can restore their state on HA reboot WITHOUT sending commands
         self._last_reported_state: dict[str, dict[str, Any]] = {}
-        self._state_store = Store(hass, STORAGE_VERSION, STORAGE_KEY_DEVICE_STATE)
-        self._tx_ctr_store = Store(hass, STORAGE_VERSION, STORAGE_KEY_TX_CTR)
-
-        # per-device tx ctr for commands
-        self._tx_ctr: dict[str, int] = {}
-        # anti-replay for incoming encrypted STATE
-        self._rx_state_last_ctr: dict[str, int] = {}
+        self._state_store = _CoalescedStore(
+            hass, STORAGE_KEY_DEVICE_STATE, lambda: dict(self._last_reported_state), save_delay
+        )
+
+        # per-device tx ctr for commands, leased in blocks (see _TxCounterLease)
+        self._tx_lease = _TxCounterLease()
+        self._tx_ctr_store = _CoalescedStore(
+            hass, STORAGE_KEY_TX_CTR, self._tx_lease.marks, save_delay, on_saved=self._tx_lease.persisted
+        )
+
+        # what each device announced, per class — persisted so platforms can
+        # create every known entity at setup instead of waiting for traffic
+        self._discovery: dict[str, dict[str, dict[str, Any]]] = {}
+        self._discovery_store = _CoalescedStore(
+            hass, STORAGE_KEY_DISCOVERY, lambda: dict(self._discovery), save_delay
+        )
+
+        # Command acks: at most one tracked command in flight per device.
+        # The random prefix keeps ids unique across restarts, since devices
+        # treat a repeat of their last id as a retransmit.
+        self._cmd_inflight: dict[str, _PendingCommand] = {}
+        self._rtt: dict[str, _RttEstimator] = {}
+        self._cid_prefix = secrets.token_hex(3)
+        self._cid_seq = 0
+
+        # Write-behind for high-rate callers (sliders): slots exist only while
+        # an interval is running or a payload is held
+        self.command_interval = float(opts.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL))
+        self._write_behind: dict[tuple[str, str], _WriteBehind] = {}
+        self._coalesce_sent = 0
+        self._coalesce_merged = 0
+
+        # Command -> first state/ack round trip, per device. Only the oldest
+        # unanswered send is kept, so a burst is measured from its start.
+        self._latency_sent: dict[str, float] = {}
+        self._latency: dict[str, _LatencyHistogram] = {}
+        self._latency_sensors = bool(opts.get(CONF_LATENCY_SENSORS, False))
+
+        # etbus_message is only fired while something listens for it, and
+        # then through a token bucket of message_rate_max events/s
+        self.message_rate_max = float(opts.get(CONF_MESSAGE_RATE_MAX, DEFAULT_MESSAGE_RATE_MAX))
+        self._msg_listened = False
+        self._msg_listened_checked = -MESSAGE_LISTENER_CHECK
+        self._msg_tokens = self.message_rate_max
+        self._msg_tokens_ts = 0.0
+
+        self.resync_window = float(opts.get(CONF_RESYNC_WINDOW, DEFAULT_RESYNC_WINDOW))
+        self._session = secrets.token_hex(4)
+        self._welcomed: set[str] = set()
+        self._ping_period = float(PING_INTERVAL)
+        self._fleet_changed = False
+
+        # Always-on pipeline counters (see pipeline_stats); timings are seconds
+        self._counters: Counter[str] = Counter()
+        self._drops: Counter[str] = Counter()
+        self._dev_counters: dict[str, Counter[str]] = {}
+        # Offline detection: per-device deadlines in a min-heap of
+        # (deadline, dev_id), re-armed lazily; one timer for the earliest
+        self._liveness: dict[str, _Liveness] = {}
+        self._liveness_heap: list[tuple[float, str]] = []
+        self._liveness_timer: asyncio.TimerHandle | None = None
+        self._liveness_timer_at: float | None = None
+
+        # anti-replay for incoming encrypted STATE (reset on boot id change)
+        self._rx_replay: dict[str, _ReplayWindow] = {}
         self._rx_state_boot: dict[str, str] = {}
 
+        # RX batching: datagrams delivered by the transport plus whatever the
+        # flush drains from the socket into one reused buffer
+        self._rx_pending: list[tuple[bytes, str]] = []
+        self._rx_flush_scheduled = False
+        self._rx_buf = bytearray(RX_BUFFER_SIZE)
+        self._rx_view = memoryview(self._rx_buf)
+        self._rx_filter = _DatagramFilter()
+
         self._hub_start_time = int(time.time())
 
         _LOGGER.debug("ET-Bus hub init port=%s crypto=%s startup_time=%s",
                      self.port, self.crypto_enabled, self._hub_start_time)
 
-    def register_listener(self, cb: Callable[[dict[str, Any]], None]) -> None:
-        self._listeners.append(cb)
+    def _apply_crypto_options(self, opts: dict[str, Any]) -> None:
+        crypto_enabled = bool(opts.get(CONF_CRYPTO_ENABLED, False))
+        psk_hex = str(opts.get(CONF_PSK_HEX, "") or "")
+        master_secret = _hex32_to_bytes(psk_hex)
+
+        if crypto_enabled and _aead_class() is None:
+            _LOGGER.error("ET-Bus crypto enabled but cryptography is missing")
+            crypto_enabled = False
+
+        if crypto_enabled and not master_secret:
+            _LOGGER.error("ET-Bus crypto enabled but psk_hex is invalid (needs 64 hex chars)")
+            crypto_enabled = False
+
+        if master_secret != self.master_secret or crypto_enabled != self.crypto_enabled:
+            self._aead_cache.clear()
+
+        self.crypto_enabled = crypto_enabled
+        self.psk_hex = psk_hex
+        self.master_secret = master_secret
+
+    def apply_options(self, opts: dict[str, Any]) -> bool:
+        """Apply changed entry options in place.
+
+        Returns True when the change needs a full entry reload (port change).
+        """
+        opts = dict(opts)
+        if int(opts.get(CONF_PORT, DEFAULT_PORT)) != self.port:
+            return True
+        # Latency sensor entities are created at platform setup
+        if bool(opts.get(CONF_LATENCY_SENSORS, False)) != self._latency_sensors:
+            return True
+        self._apply_crypto_options(opts)
+        if self.crypto_enabled:
+            self._warm_crypto_cache()
+        save_delay = float(opts.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY))
+        for store in (self._store, self._state_store, self._tx_ctr_store, self._discovery_store):
+            store.max_staleness = save_delay
+        self.command_interval = float(opts.get(CONF_COMMAND_INTERVAL, DEFAULT_COMMAND_INTERVAL))
+        self.message_rate_max = float(opts.get(CONF_MESSAGE_RATE_MAX, DEFAULT_MESSAGE_RATE_MAX))
+        self.resync_window = float(opts.get(CONF_RESYNC_WINDOW, DEFAULT_RESYNC_WINDOW))
+        _LOGGER.debug("ET-Bus options applied crypto=%s", self.crypto_enabled)
+        return False
+
+    def register_listener(
+        self,
+        cb: Callable[[dict[str, Any]], None],
+        *,
+        dev_id: str | None = None,
+        class_prefix: str | None = None,
+        msg_types: tuple[str, ...] | None = None,
+        name: str | None = None,
+    ) -> Callable[[], None]:
+        """Subscribe to decoded messages matching the given filters.
+
+        Calls are timed per name (defaults to the callback's qualified
+        name), so every entity of a platform can share one bucket.
+        Returns an unsubscribe callable (suitable for async_on_remove /
+        async_on_unload).
+        """
+        if not name:
+            name = f"{(getattr(cb, '__module__', None) or '').rsplit('.', 1)[-1]}.{getattr(cb, '__qualname__', repr(cb))}"
+        stats = self._listener_stats.get(name)
+        if stats is None:
+            stats = self._listener_stats[name] = _ListenerStats()
+        route = _Route(cb, dev_id, class_prefix or None, tuple(msg_types) if msg_types else None, name, stats)
+        by_type = self._routes.setdefault(dev_id, {})
+        for mtype in route.msg_types or (None,):
+            by_type[mtype] = by_type.get(mtype, ()) + (route,)
+
+        def _unsubscribe() -> None:
+            by_type = self._routes.get(dev_id)
+            if not by_type:
+                return
+            for mtype in route.msg_types or (None,):
+                left = tuple(r for r in by_type.get(mtype, ()) if r is not route)
+                if left:
+                    by_type[mtype] = left
+                else:
+                    by_type.pop(mtype, None)
+            if not by_type:
+                self._routes.pop(dev_id, None)
+
+        return _unsubscribe
+
+    def _dispatch(self, msg: dict[str, Any], dev_id: str, mtype: str) -> None:
+        cls = str(msg.get("class", "") or "")
+        routes = self._routes
+        for key in (dev_id, None):
+            by_type = routes.get(key)
+            if not by_type:
+                continue
+            for t in (mtype, None):
+                for route in by_type.get(t, ()):
+                    if route.class_prefix and not cls.startswith(route.class_prefix):
+                        continue
+                    t0 = time.perf_counter()
+                    try:
+                        route.cb(msg)
+                    except Exception:
+                        route.stats.errors += 1
+                        _LOGGER.exception("ET-Bus listener error (%s)", route.name)
+                    self._account_listener(route, time.perf_counter() - t0, dev_id, mtype)
+
+    def _account_listener(self, route: _Route, elapsed: float, dev_id: str, mtype: str) -> None:
+        s = route.stats
+        s.calls += 1
+        s.total += elapsed
+        s.ewma = elapsed if s.calls == 1 else s.ewma + 0.1 * (elapsed - s.ewma)
+        if elapsed > s.max:
+            s.max = elapsed
+        if elapsed <= LISTENER_BUDGET:
+            return
+        s.slow += 1
+        now = time.monotonic()
+        if now - s.last_warn >= LISTENER_WARN_INTERVAL:
+            s.last_warn = now
+            _LOGGER.warning(
+                "ET-Bus listener %s took %.1f ms on %s from %s (budget %.0f ms, %d slow calls so far)",
+                route.name, elapsed * 1000, mtype, dev_id, LISTENER_BUDGET * 1000, s.slow,
+            )
+
+    def listener_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-listener call timing, keyed by listener name."""
+        return {name: s.as_dict() for name, s in self._listener_stats.items()}
 
     async def async_start(self) -> None:
+        t0 = time.perf_counter()
         # Load persisted data from disk before anything else
-        await self._load_last_commands()
-        await self._load_device_states()
-        await self._load_tx_counters()
-
-        self._open_socket()
-        self._task = asyncio.create_task(self._rx_loop())
+        await asyncio.gather(
+            self._load_last_commands(),
+            self._load_device_states(),
+            self._load_tx_counters(),
+            self._load_discovery(),
+        )
+        self._prune_discovery()
+        t1 = time.perf_counter()
+        self._warm_crypto_cache()
+        t2 = time.perf_counter()
+
+        await self._open_transport()
         self._ping_task = asyncio.create_task(self._ping_loop())
-        self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._on_stop)
+        self._unsub_stop = self.hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._on_stop)
+        t3 = time.perf_counter()
 
-        # Send startup ping (devices will re-announce)
-        await asyncio.sleep(2)
+        # Startup ping (devices will re-announce) goes out in the background
+        # so entry setup does not wait for it
+        self._startup_task = asyncio.create_task(self._startup_ping_later())
+
+        self.startup_timings = {
+            "load_ms": round((t1 - t0) * 1000, 1),
+            "crypto_ms": round((t2 - t1) * 1000, 1),
+            "socket_ms": round((t3 - t2) * 1000, 1),
+        }
+
+    async def _startup_ping_later(self) -> None:
+        await asyncio.sleep(STARTUP_PING_DELAY)
+        self._startup_task = None
         self._send_startup_ping()
 
     async def _on_stop(self, _ev) -> None:
-        # Persist before shutting down
-        await self._save_last_commands()
-        await self._save_device_states()
-        await self._save_tx_counters()
+        # The once-listener has fired; it must not be removed again
+        self._unsub_stop = None
         await self.async_stop()
 
     async def async_stop(self) -> None:
-        for t in (self._ping_task, self._task):
-            if t:
-                t.cancel()
+        if self._unsub_stop:
+            self._unsub_stop()
+            self._unsub_stop = None
+        if self._ping_task:
+            self._ping_task.cancel()
         self._ping_task = None
-        self._task = None
+        if self._startup_task:
+            self._startup_task.cancel()
+        self._startup_task = None
+        if self._liveness_timer:
+            self._liveness_timer.cancel()
+        self._liveness_timer = None
+        self._liveness_timer_at = None
+        if self._transport:
+            self._transport.close()
+        self._transport = None
+        self._rx_pending = []
+        for wb in self._write_behind.values():
+            if wb.timer:
+                wb.timer.cancel()
+        self._write_behind.clear()
+        for dev_id in list(self._cmd_inflight):
+            self._finish_command(dev_id, "cancelled")
         if self._sock:
             try:
                 self._sock.close()
@@ -155,6 +914,9 @@ class EtBusHub:
                 pass
         self._sock = None
 
+        # Persist anything still pending before shutting down
+        await self.async_flush_stores()
+
     # ── Persistent storage ───────────────────────────────────────────────
 
     async def _load_last_commands(self) -> None:
@@ -170,17 +932,6 @@ class EtBusHub:
             _LOGGER.exception("ET-Bus: failed to load persisted commands")
             self._last_command = {}
 
-    async def _save_last_commands(self) -> None:
-        """Persist the last-command map to disk."""
-        try:
-            await self._store.async_save(self._last_command)
-        except Exception:
-            _LOGGER.exception("ET-Bus: failed to persist commands")
-
-    def _schedule_save(self) -> None:
-        """Fire-and-forget save (non-blocking from sync context)."""
-        asyncio.ensure_future(self._save_last_commands())
-
     async def _load_device_states(self) -> None:
         """Load persisted device-reported states from disk."""
         try:
@@ -194,53 +945,141 @@ class EtBusHub:
             _LOGGER.exception("ET-Bus: failed to load persisted device states")
             self._last_reported_state = {}
 
-    async def _save_device_states(self) -> None:
-        """Persist the last-reported-state map to disk."""
+    def get_last_reported_state(self, dev_id: str) -> dict[str, Any] | None:
+        """Get the last reported state for a device (for entity restoration)."""
+        return self._last_reported_state.get(dev_id)
+
+    async def _load_discovery(self) -> None:
+        """Load the persisted discovery cache from disk."""
         try:
-            await self._state_store.async_save(self._last_reported_state)
+            data = await self._discovery_store.async_load()
+            if isinstance(data, dict):
+                self._discovery = {
+                    str(dev_id): {str(cls): dict(desc) for cls, desc in by_class.items() if isinstance(desc, dict)}
+                    for dev_id, by_class in data.items()
+                    if isinstance(by_class, dict)
+                }
+                _LOGGER.debug("ETBUS: Loaded discovery cache for %d devices", len(self._discovery))
+            else:
+                self._discovery = {}
         except Exception:
-            _LOGGER.exception("ET-Bus: failed to persist device states")
+            _LOGGER.exception("ET-Bus: failed to load discovery cache")
+            self._discovery = {}
+
+    def _prune_discovery(self) -> None:
+        """Drop cached devices that have not been heard for DISCOVERY_MAX_AGE_DAYS."""
+        today = int(_now() // 86400)
+        stale = []
+        for dev_id, by_class in self._discovery.items():
+            for desc in by_class.values():
+                # Entries from before "seen" was recorded start aging now
+                desc.setdefault("seen", today)
+            if all(today - int(desc["seen"]) > DISCOVERY_MAX_AGE_DAYS for desc in by_class.values()):
+                stale.append(dev_id)
+        for dev_id in stale:
+            self.forget_device(dev_id)
+        if stale:
+            _LOGGER.debug("ET-Bus: dropped %d devices not heard for %d days", len(stale), DISCOVERY_MAX_AGE_DAYS)
+
+    def forget_device(self, dev_id: str) -> None:
+        """Remove a device from the discovery cache so it is not restored again."""
+        if self._discovery.pop(dev_id, None) is not None:
+            self._discovery_store.mark_dirty()
+        if self._last_reported_state.pop(dev_id, None) is not None:
+            self._state_store.mark_dirty()
+
+    def device_available(self, dev_id: str) -> bool:
+        """Online flag for entities; devices only known from the cache are
+        unavailable until they are heard after this start."""
+        info = self.devices.get(dev_id)
+        if info is None:
+            return dev_id not in self._discovery
+        return bool(info.get("online", True))
+
+    def known_devices(self, class_prefix: str | None = None) -> list[tuple[str, str, dict[str, Any]]]:
+        """Cached (dev_id, class, descriptor) for every device seen before."""
+        return [
+            (dev_id, cls, desc)
+            for dev_id, by_class in self._discovery.items()
+            for cls, desc in by_class.items()
+            if class_prefix is None or cls.startswith(class_prefix)
+        ]
+
+    def _remember_discovery(self, dev_id: str, cls: str, mtype: str, payload: dict[str, Any]) -> None:
+        """Fold what a discover/state/pong says about a device into the cache.
+
+        State messages only cost a key-list compare once their shape is known.
+        "seen" is the day the device was last heard, so it costs at most one
+        write per device per day.
+        """
+        today = int(_now() // 86400)
+        by_class = self._discovery.get(dev_id)
+        cached = by_class.get(cls) if by_class else None
+        keys = list(payload) if mtype == "state" else None
+        if keys is not None and cached is not None and cached.get("keys") == keys and cached.get("seen") == today:
+            return
 
-    def _schedule_save_states(self) -> None:
-        """Fire-and-forget save of device states."""
-        asyncio.ensure_future(self._save_device_states())
+        desc = dict(cached) if cached else {}
+        desc["seen"] = today
+        if keys is not None:
+            desc["keys"] = keys
+            desc["metrics"] = [k for k, v in payload.items() if v is not None and not isinstance(v, (dict, list))]
+        for field in DISCOVERY_FIELDS:
+            if field in payload:
+                desc[field] = payload[field]
+        if isinstance(payload.get("switches"), list):
+            desc["switches"] = payload["switches"]
+        if desc == cached:
+            return
 
-    def get_last_reported_state(self, dev_id: str) -> dict[str, Any] | None:
-        """Get the last reported state for a device (for entity restoration)."""
-        return self._last_reported_state.get(dev_id)
+        self._discovery.setdefault(dev_id, {})[cls] = desc
+        self._discovery_store.mark_dirty()
 
     async def _load_tx_counters(self) -> None:
-        """Load HA->device encrypted command counters.
+        """Load HA->device encrypted command counter leases.
 
         ESP nodes reject old command counters as replay protection. Persisting
         HA's transmit counters prevents a Home Assistant restart from forcing
-        an ESP reboot before commands are accepted again.
+        an ESP reboot before commands are accepted again. The stored value is
+        the high-water mark of each device's leased block (older files hold
+        the last counter itself, which loads the same way).
         """
+        marks: dict[str, int] = {}
         try:
             data = await self._tx_ctr_store.async_load()
             if isinstance(data, dict):
-                self._tx_ctr = {
+                marks = {
                     str(k): int(v)
                     for k, v in data.items()
                     if isinstance(v, (int, float, str)) and str(v).isdigit()
                 }
-                _LOGGER.debug("ETBUS: Loaded %d tx counters", len(self._tx_ctr))
-            else:
-                self._tx_ctr = {}
+                _LOGGER.debug("ETBUS: Loaded %d tx counters", len(marks))
         except Exception:
             _LOGGER.exception("ET-Bus: failed to load tx counters")
-            self._tx_ctr = {}
 
-    async def _save_tx_counters(self) -> None:
-        """Persist HA->device encrypted command counters."""
-        try:
-            await self._tx_ctr_store.async_save(dict(self._tx_ctr))
-        except Exception:
-            _LOGGER.exception("ET-Bus: failed to persist tx counters")
-
-    def _schedule_save_tx_counters(self) -> None:
-        """Fire-and-forget save of tx counters."""
-        asyncio.ensure_future(self._save_tx_counters())
+        self._tx_lease.load(marks)
+        if marks:
+            # Reserve the first block past the stored marks before any send
+            self._tx_ctr_store.mark_dirty()
+            await self._tx_ctr_store.async_flush()
+
+    async def async_flush_stores(self) -> None:
+        """Write every store that has unsaved changes."""
+        await asyncio.gather(
+            self._store.async_flush(),
+            self._state_store.async_flush(),
+            self._tx_ctr_store.async_flush(),
+            self._discovery_store.async_flush(),
+        )
+
+    def persistence_stats(self) -> dict[str, dict[str, Any]]:
+        """Writes issued vs. coalesced per store."""
+        return {
+            "last_commands": self._store.stats(),
+            "device_states": self._state_store.stats(),
+            "tx_counters": self._tx_ctr_store.stats(),
+            "discovery": self._discovery_store.stats(),
+        }
 
     # ── Socket ───────────────────────────────────────────────────────────
 
@@ -271,54 +1110,177 @@ class EtBusHub:
             return None
         return hashlib.sha256(self.master_secret + dev_id.encode("utf-8")).digest()
 
+    def _aead_for_dev(self, dev_id: str) -> Any | None:
+        """Cached ChaCha20Poly1305 for a device (LRU, keyed by device id and KID)."""
+        ck = (dev_id, self.kid)
+        aead = self._aead_cache.get(ck)
+        if aead is not None:
+            self._aead_cache.move_to_end(ck)
+            return aead
+
+        key = self._derive_key_for_dev(dev_id)
+        if not key:
+            return None
+        aead = _aead_class()(key)
+        self._aead_cache[ck] = aead
+        if len(self._aead_cache) > AEAD_CACHE_MAX:
+            self._aead_cache.popitem(last=False)
+        return aead
+
+    def _warm_crypto_cache(self) -> None:
+        """Build ciphers for every device we already know about."""
+        if not self.crypto_enabled:
+            return
+        known = (
+            set(self.devices) | set(self._discovery) | set(self._last_reported_state)
+            | set(self._last_command) | set(self._tx_lease.marks())
+        )
+        known.discard(self.hub_id)
+        for dev_id in list(known)[:AEAD_CACHE_MAX]:
+            self._aead_for_dev(dev_id)
+        _LOGGER.debug("ET-Bus crypto cache warmed for %d devices", len(self._aead_cache))
+
     def _nonce_cmd(self, ctr: int) -> bytes:
         return b"\x00\x00\x00\x00" + _u64_le(ctr)
 
     # ── RX loop ──────────────────────────────────────────────────────────
 
-    async def _rx_loop(self) -> None:
-        assert self._sock is not None
+    async def _open_transport(self) -> None:
+        if self._transport is not None:
+            return
+        self._open_socket()
         loop = asyncio.get_running_loop()
-
-        while True:
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _EtBusDatagramProtocol(self), sock=self._sock
+        )
+
+    def _rx_enqueue(self, data: bytes, src_ip: str) -> None:
+        """Queue a datagram from the transport and schedule one batch flush."""
+        self._rx_pending.append((data, src_ip))
+        if not self._rx_flush_scheduled:
+            self._rx_flush_scheduled = True
+            self.hass.loop.call_soon(self._rx_flush)
+
+    def _rx_flush(self) -> None:
+        """Drain everything pending on the socket and run it as one batch."""
+        self._rx_flush_scheduled = False
+        pending, self._rx_pending = self._rx_pending, []
+        rx_ts = _now()
+        now = time.monotonic()
+
+        batch: list[tuple[dict[str, Any], str]] = []
+        for data, src_ip in pending:
+            msg = self._rx_parse(data, src_ip, now)
+            if msg is not None:
+                batch.append((msg, src_ip))
+
+        drained = self._rx_drain(batch, now)
+        if batch:
+            self._rx_process_batch(batch, rx_ts)
+
+        # More than one batch worth was waiting: yield to the loop and continue
+        if drained >= RX_DRAIN_MAX and not self._rx_flush_scheduled:
+            self._rx_flush_scheduled = True
+            self.hass.loop.call_soon(self._rx_flush)
+
+    def _rx_drain(self, batch: list[tuple[dict[str, Any], str]], now: float) -> int:
+        """Read datagrams already queued in the kernel into the reused buffer."""
+        sock = self._sock
+        if sock is None:
+            return 0
+        view = self._rx_view
+        count = 0
+        while count < RX_DRAIN_MAX:
             try:
-                data, (src_ip, _src_port) = await loop.sock_recvfrom(self._sock, 8192)
-            except asyncio.CancelledError:
-                return
-            except Exception:
-                await asyncio.sleep(0.05)
-                continue
-
-            rx_ts = _now()
+                n, addr = sock.recvfrom_into(self._rx_buf)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                _LOGGER.debug("ET-Bus RX drain error: %r", e)
+                break
+            count += 1
+            msg = self._rx_parse(view[:n], addr[0], now)
+            if msg is not None:
+                batch.append((msg, addr[0]))
+        return count
+
+    def _rx_parse(self, data: bytes | memoryview, src_ip: str, now: float) -> dict[str, Any] | None:
+        counters = self._counters
+        counters["rx_packets"] += 1
+        counters["rx_bytes"] += len(data)
+        reason = self._rx_filter.check(data, src_ip, now)
+        if reason is not None:
+            self._drop(reason)
+            return None
+        try:
+            if codec.is_v2(data):
+                msg = codec.decode_v2(data)
+            else:
+                msg = codec.loads(data)
+        except Exception:
+            msg = None
+        if not isinstance(msg, dict):
+            counters["rx_parse_errors"] += 1
+            return None
+        return msg
 
+    def _rx_process_batch(self, batch: list[tuple[dict[str, Any], str]], rx_ts: float) -> None:
+        t0 = time.perf_counter()
+        for msg, src_ip in batch:
             try:
-                msg = json.loads(data.decode("utf-8", errors="strict"))
+                self._rx_handle(msg, src_ip, rx_ts)
             except Exception:
-                continue
-
-            v = int(msg.get("v", 0) or 0)
-            mtype = str(msg.get("type", "") or "")
-            dev_id = str(msg.get("id", "") or "")
-            payload = msg.get("payload") or {}
-
-            if v != 1 or not mtype or not dev_id:
-                continue
-
-            if dev_id != self.hub_id:
-                self._touch_device(dev_id, src_ip, mtype)
-                self._handle_device_envelope(dev_id, msg, src_ip, mtype)
+                self._counters["rx_handler_errors"] += 1
+                _LOGGER.exception("ET-Bus RX handler error")
+        self._counters["rx_batches"] += 1
+        self._counters["rx_batch_seconds"] += time.perf_counter() - t0
+
+    def _rx_handle(self, msg: dict[str, Any], src_ip: str, rx_ts: float) -> None:
+        v = int(msg.get("v", 0) or 0)
+        mtype = str(msg.get("type", "") or "")
+        dev_id = str(msg.get("id", "") or "")
+        payload = msg.get("payload") or {}
+
+        if v != 1 or not mtype or not dev_id:
+            self._drop("envelope")
+            return
 
-            was_encrypted = (self.crypto_enabled and isinstance(payload, dict) and payload.get("_enc") == 1)
+        status_change: str | None = None
+        if dev_id != self.hub_id:
+            self._dev_count(dev_id, "rx_packets")
+            status_change = self._touch_device(dev_id, src_ip, mtype)
+            if self._handle_device_envelope(dev_id, msg, src_ip, mtype) and status_change is None:
+                status_change = "boot"
+            if status_change is not None:
+                self._fleet_changed = True
+                self._welcomed.discard(dev_id)
+            if dev_id not in self._welcomed:
+                self._welcome(dev_id, src_ip)
+
+        was_encrypted = (self.crypto_enabled and isinstance(payload, dict) and payload.get("_enc") == 1)
+
+        # A sealed v2 payload is raw bytes; without crypto it cannot be used
+        if (
+            not was_encrypted
+            and msg.get("_wire") == codec.WIRE_V2
+            and isinstance(payload, dict)
+            and payload.get("_enc") == 1
+        ):
+            self._drop("sealed_no_crypto", dev_id)
+            return
 
-            # Decrypt incoming encrypted STATE (device -> hub)
-            if was_encrypted:
-                plain = self._decrypt_wrapper_state(dev_id=dev_id, wrapper=payload, src_ip=src_ip)
-                if plain is None:
-                    continue
-                msg["payload"] = plain
+        # Decrypt incoming encrypted STATE (device -> hub)
+        if was_encrypted:
+            plain = self._decrypt_wrapper_state(dev_id=dev_id, wrapper=payload, src_ip=src_ip)
+            if plain is None:
+                return
+            msg["payload"] = plain
+            self._counters["rx_decrypted"] += 1
 
-            # Web panel event
-            self.hass.bus.async_fire("etbus_message", {
+        # Web panel event
+        if self._message_event_wanted():
+            self._counters["events_message"] += 1
+            self.hass.bus.async_fire(EVENT_MESSAGE, {
                 "id": dev_id,
                 "type": mtype,
                 "class": msg.get("class", ""),
@@ -330,64 +1292,123 @@ class EtBusHub:
                 "_encrypted": was_encrypted,
             })
 
-            # Persist device-reported state so HA entities can restore
-            # their state on HA reboot without sending commands.
-            # IMPORTANT: skip discovery-format payloads where "switches"
-            # is a list of dicts (e.g. [{"id":"1","name":"Relay 1"},...]).
-            # Only persist real state where "switches" is a dict
-            # (e.g. {"1": true, "2": false}).
-            if mtype == "state" and dev_id != self.hub_id:
-                reported = msg.get("payload")
-                if isinstance(reported, dict) and reported:
-                    # Filter: if "switches" exists and is a list, this is
-                    # a discovery payload sent via sendState — don't persist
-                    sw = reported.get("switches")
-                    if isinstance(sw, list):
-                        _LOGGER.debug(
-                            "ET-Bus: skipping discovery-format state persistence for %s",
-                            dev_id,
-                        )
-                    else:
-                        self._last_reported_state[dev_id] = {
-                            "dev_class": str(msg.get("class", "")),
-                            "payload": reported,
-                            "ts": rx_ts,
-                        }
-                        self._schedule_save_states()
-
-            for cb in list(self._listeners):
-                try:
-                    cb(msg)
-                except Exception:
-                    _LOGGER.exception("ET-Bus listener error")
-
-            if dev_id != self.hub_id:
-                self.hass.bus.async_fire("etbus_device_status", {
-                    "id": dev_id,
-                    "online": True,
-                    "reason": mtype,
-                    "ip": src_ip
-                })
-
-    def _touch_device(self, dev_id: str, ip: str, mtype: str = "") -> None:
-        d = self.devices.setdefault(dev_id, {})
+        # Discovery cache: names, switch lists, effects, sensor keys
+        if mtype in ("discover", "state", "pong") and dev_id != self.hub_id:
+            reported = msg.get("payload")
+            cls = msg.get("class")
+            if cls and isinstance(reported, dict):
+                self._remember_discovery(dev_id, str(cls), mtype, reported)
+
+        # Persist device-reported state so HA entities can restore
+        # their state on HA reboot without sending commands.
+        # IMPORTANT: skip discovery-format payloads where "switches"
+        # is a list of dicts (e.g. [{"id":"1","name":"Relay 1"},...]).
+        # Only persist real state where "switches" is a dict
+        # (e.g. {"1": true, "2": false}).
+        if mtype == "state" and dev_id != self.hub_id:
+            reported = msg.get("payload")
+            if isinstance(reported, dict) and reported:
+                # Filter: if "switches" exists and is a list, this is
+                # a discovery payload sent via sendState — the discovery
+                # cache keeps it, the state store must not
+                sw = reported.get("switches")
+                if isinstance(sw, list):
+                    _LOGGER.debug(
+                        "ET-Bus: skipping discovery-format state persistence for %s",
+                        dev_id,
+                    )
+                else:
+                    self._last_reported_state[dev_id] = {
+                        "dev_class": str(msg.get("class", "")),
+                        "payload": reported,
+                        "ts": rx_ts,
+                    }
+                    self._state_store.mark_dirty()
+
+        if mtype == "ack" and dev_id in self._cmd_inflight:
+            self._on_ack(dev_id, msg.get("payload"))
+
+        if (mtype == "state" or mtype == "ack") and dev_id in self._latency_sent:
+            self._record_latency(dev_id)
+
+        t0 = time.perf_counter()
+        self._dispatch(msg, dev_id, mtype)
+        self._counters["rx_dispatched"] += 1
+        self._counters["dispatch_seconds"] += time.perf_counter() - t0
+
+        # Status events are edge-triggered: new device, back online, new IP
+        # or reboot. Steady-state traffic fires nothing here.
+        if status_change:
+            self._counters["events_status"] += 1
+            self.hass.bus.async_fire(EVENT_DEVICE_STATUS, {
+                "id": dev_id,
+                "online": True,
+                "reason": status_change,
+                "type": mtype,
+                "ip": src_ip,
+                "boot": str(msg.get("boot", "") or ""),
+            })
+
+    def _message_event_wanted(self) -> bool:
+        """True when an etbus_message event should be fired for this packet.
+
+        Only listeners registered for etbus_message itself count (the panel
+        subscribes by event type); the lookup is refreshed once a second.
+        """
+        now = time.monotonic()
+        if now - self._msg_listened_checked >= MESSAGE_LISTENER_CHECK:
+            self._msg_listened_checked = now
+            self._msg_listened = self.hass.bus.async_listeners().get(EVENT_MESSAGE, 0) > 0
+        if not self._msg_listened:
+            return False
+
+        rate = self.message_rate_max
+        if rate <= 0:
+            return True
+        self._msg_tokens = min(rate, self._msg_tokens + (now - self._msg_tokens_ts) * rate)
+        self._msg_tokens_ts = now
+        if self._msg_tokens < 1.0:
+            self._counters["events_message_rate_limited"] += 1
+            return False
+        self._msg_tokens -= 1.0
+        return True
+
+    def _touch_device(self, dev_id: str, ip: str, mtype: str = "") -> str | None:
+        """Refresh liveness; returns the transition ("new", "online", "ip") if any."""
+        d = self.devices.get(dev_id)
+        if d is None:
+            d = self.devices[dev_id] = {}
+            change: str | None = "new"
+        elif not d.get("online", True):
+            change = "online"
+        elif d.get("ip") != ip:
+            change = "ip"
+        else:
+            change = None
         d["ip"] = ip
         d["last_seen"] = _now()
         d["online"] = True
+        self._liveness_touch(dev_id, mtype)
 
         # NOTE: We do NOT resend commands on HA reboot.
         # The device has its own NVS persistence and will report
         # its current state via pong/discover/state messages.
         # HA entities will update from those state reports.
+        return change
+
+    def _handle_device_envelope(self, dev_id: str, msg: dict[str, Any], src_ip: str, mtype: str) -> bool:
+        """Track ETBus 1.7 envelope metadata without breaking old devices.
 
-    def _handle_device_envelope(self, dev_id: str, msg: dict[str, Any], src_ip: str, mtype: str) -> None:
-        """Track ETBus 1.7 envelope metadata without breaking old devices."""
+        Returns True when the boot id changed (device rebooted).
+        """
         info = self.devices.setdefault(dev_id, {})
+        rebooted = False
 
         boot = str(msg.get("boot", "") or "")
         if boot:
             old_boot = self._rx_state_boot.get(dev_id)
             if old_boot and old_boot != boot:
+                rebooted = True
                 _LOGGER.debug(
                     "ETBUS DEVICE BOOT: dev=%s boot=%s old=%s ip=%s reason=%s",
                     dev_id,
@@ -396,7 +1417,9 @@ class EtBusHub:
                     src_ip,
                     mtype,
                 )
-                self._rx_state_last_ctr[dev_id] = 0
+                win = self._rx_replay.get(dev_id)
+                if win is not None:
+                    win.reset()
             self._rx_state_boot[dev_id] = boot
             info["boot"] = boot
 
@@ -413,160 +1436,680 @@ class EtBusHub:
             if isinstance(features, list):
                 info["features"] = [str(x) for x in features]
 
+        return rebooted
+
     def _decrypt_wrapper_state(
         self, *, dev_id: str, wrapper: dict[str, Any], src_ip: str
     ) -> dict[str, Any] | None:
-        if not self.crypto_enabled or not self.master_secret or ChaCha20Poly1305 is None:
+        if not self.crypto_enabled or not self.master_secret:
+            self._drop("no_key", dev_id)
             return None
 
         expected_ip = (self.devices.get(dev_id) or {}).get("ip")
         if expected_ip and expected_ip != src_ip:
+            self._drop("ip_mismatch", dev_id)
             _LOGGER.warning("ETBUS DROP rx_state dev=%s from ip=%s (expected %s)", dev_id, src_ip, expected_ip)
             return None
 
         kid = int(wrapper.get("kid") or 0)
         ctr = int(wrapper.get("ctr") or 0)
 
-        if kid != int(ETBUS_KID) or ctr < 0:
+        if kid != self.kid or ctr < 0:
+            self._drop("bad_wrapper", dev_id)
             return None
 
-        last = int(self._rx_state_last_ctr.get(dev_id, 0))
-
-        # Device reboot detection (ctr reset)
-        if ctr <= last:
-            drop = last - ctr
-            if ctr == last:
-                # Duplicate packet, usually because a device sends both unicast
-                # and multicast. The first copy was accepted; drop this quietly.
-                return None
-            # Accept reset only for very low ctr, or huge drop
-            if ctr in (0, 1) or ctr < 30 or drop >= 50:
-                _LOGGER.debug("ETBUS DEVICE REBOOT: dev=%s ctr=%s last=%s drop=%s", dev_id, ctr, last, drop)
+        # Replay check before any crypto work; the window only moves once
+        # the payload has authenticated
+        win = self._rx_replay.get(dev_id)
+        if win is None:
+            win = self._rx_replay[dev_id] = _ReplayWindow()
+        restart = False
+        verdict = win.check(ctr)
+        if verdict is not None:
+            if win.is_restart(ctr):
                 # Device has NVS persistence — it restores its own state.
                 # We just accept the counter reset and let the state report through.
+                restart = True
+                _LOGGER.debug("ETBUS DEVICE REBOOT: dev=%s ctr=%s last=%s", dev_id, ctr, win.top)
+            elif verdict == "duplicate":
+                # Usually the second copy of a unicast + multicast send.
+                # The first copy was accepted; drop this quietly.
+                self._drop("duplicate", dev_id)
+                return None
             else:
-                _LOGGER.warning("ETBUS REPLAY: dev=%s ctr=%s last=%s drop=%s", dev_id, ctr, last, drop)
+                self._drop("replay", dev_id)
+                _LOGGER.warning("ETBUS REPLAY: dev=%s ctr=%s last=%s", dev_id, ctr, win.top)
                 return None
 
-        nonce_b64 = wrapper.get("nonce")
-        ct_b64 = wrapper.get("ct")
-        tag_b64 = wrapper.get("tag")
-        if not (nonce_b64 and ct_b64 and tag_b64):
+        nonce = wrapper.get("nonce")
+        ct = wrapper.get("ct")
+        tag = wrapper.get("tag")
+        if not (nonce and ct and tag):
+            self._drop("bad_wrapper", dev_id)
             return None
 
-        try:
-            nonce = _b64d(str(nonce_b64))
-            ct = _b64d(str(ct_b64))
-            tag = _b64d(str(tag_b64))
-        except Exception:
-            return None
+        # v2 carries raw bytes and a MessagePack plaintext; v1 is base64 + JSON
+        wire_v2 = isinstance(nonce, bytes)
+        if not wire_v2:
+            try:
+                nonce = _b64d(str(nonce))
+                ct = _b64d(str(ct))
+                tag = _b64d(str(tag))
+            except Exception:
+                self._drop("bad_wrapper", dev_id)
+                return None
 
         if len(nonce) != 12 or len(tag) != 16 or len(ct) == 0:
+            self._drop("bad_wrapper", dev_id)
             return None
 
-        key = self._derive_key_for_dev(dev_id)
-        if not key:
+        aead = self._aead_for_dev(dev_id)
+        if aead is None:
+            self._drop("no_key", dev_id)
             return None
 
         try:
-            aead = ChaCha20Poly1305(key)
             pt = aead.decrypt(nonce, ct + tag, None)
-            plain = json.loads(pt.decode("utf-8", errors="strict"))
+            plain = codec.unpackb(pt) if wire_v2 else codec.loads(pt)
             if isinstance(plain, dict):
-                self._rx_state_last_ctr[dev_id] = ctr
+                if restart:
+                    win.reset()
+                    self._counters["rx_ctr_resets"] += 1
+                elif ctr < win.top:
+                    self._counters["rx_reordered"] += 1
+                win.commit(ctr)
                 return plain
         except Exception as e:
+            self._drop("decrypt", dev_id)
             _LOGGER.error("❌ ETBUS DEC FAIL rx_state dev=%s ctr=%s err=%r", dev_id, ctr, e)
             return None
 
+        self._drop("decrypt", dev_id)
         return None
 
-    def send_command(self, dev_id: str, dev_class: str, payload: dict[str, Any], *, store_last: bool = True) -> None:
+    def send_command(
+        self,
+        dev_id: str,
+        dev_class: str,
+        payload: dict[str, Any],
+        *,
+        store_last: bool = True,
+        coalesce: bool = False,
+    ) -> None:
+        """Send a command without waiting; acked devices still get retransmits.
+
+        With coalesce=True the payload must be the full desired state: the
+        first call goes out at once, later ones within command_interval (or
+        while the device's previous command awaits its ack) are merged and
+        only the latest is sent when the slot frees up.
+        """
+        if coalesce:
+            self._send_coalesced(dev_id, dev_class, payload, store_last)
+        else:
+            self._send_command(dev_id, dev_class, payload, store_last=store_last)
+
+    async def async_send_command(
+        self, dev_id: str, dev_class: str, payload: dict[str, Any], *, store_last: bool = True
+    ) -> CommandResult:
+        """Send a command and wait until the device acks it or retries run out."""
+        fut = self._send_command(dev_id, dev_class, payload, store_last=store_last)
+        if fut is None:
+            return CommandResult(dev_id, "unsent")
+        return await fut
+
+    def _send_command(
+        self, dev_id: str, dev_class: str, payload: dict[str, Any], *, store_last: bool
+    ) -> asyncio.Future | None:
         info = self.devices.get(dev_id) or {}
         ip = info.get("ip")
         if not ip:
             _LOGGER.warning("ET-Bus: no IP for %s", dev_id)
-            return
+            return None
+
+        if self.crypto_enabled and self.master_secret and not self._tx_lease.ready(dev_id):
+            fut = self.hass.loop.create_future()
+            self.hass.async_create_task(self._async_send_leased(fut, dev_id, dev_class, payload, store_last))
+            return fut
 
         if store_last:
-            self._last_command[dev_id] = {
-                "dev_class": dev_class,
-                "payload": payload.copy() if payload else {}
-            }
-            # Persist to disk so we survive HA restarts
-            self._schedule_save()
+            self._remember_command(dev_id, dev_class, payload)
 
-        msg: dict[str, Any] = {
+        features = info.get("features") or ()
+        cid: str | None = None
+        if FEATURE_ACK in features:
+            self._cid_seq += 1
+            cid = f"{self._cid_prefix}{self._cid_seq:x}"
+
+        if codec.FEATURE_V2 in features:
+            data = self._encode_command_v2(dev_id, dev_class, payload or {}, cid)
+        else:
+            data = self._encode_command_v1(dev_id, dev_class, payload or {}, cid)
+        if data is None:
+            return None
+
+        # A retransmit of an older command must never land after this one
+        self._finish_command(dev_id, "superseded")
+        self._udp_send_bytes(ip, self.port, data)
+        self._dev_count(dev_id, "tx_commands")
+        self._latency_sent.setdefault(dev_id, time.monotonic())
+
+        fut = self.hass.loop.create_future()
+        if cid is None:
+            fut.set_result(CommandResult(dev_id, "unacked", attempts=1))
+            return fut
+
+        pend = _PendingCommand(cid, dev_id, data, fut, time.monotonic())
+        self._cmd_inflight[dev_id] = pend
+        self._arm_retransmit(pend)
+        return fut
+
+    async def _async_send_leased(
+        self, fut: asyncio.Future, dev_id: str, dev_class: str, payload: dict[str, Any], store_last: bool
+    ) -> None:
+        """Send a command held back until the device's counter lease is on disk."""
+        await self._async_ensure_leases((dev_id,))
+        if fut.done():
+            return
+        inner = None
+        if self._tx_lease.ready(dev_id):
+            inner = self._send_command(dev_id, dev_class, payload, store_last=store_last)
+        if inner is None:
+            fut.set_result(CommandResult(dev_id, "unsent"))
+            return
+        result = await inner
+        if not fut.done():
+            fut.set_result(result)
+
+    async def _async_ensure_leases(self, dev_ids: Iterable[str]) -> None:
+        """Reserve counter blocks for devices that have none and wait for the write.
+
+        A new device starts from the clock: a high, monotonic-enough value so
+        ESP nodes with an old remembered command counter do not reject HA as
+        a replay.
+        """
+        waiting = False
+        for dev_id in dev_ids:
+            if self._tx_lease.ready(dev_id):
+                continue
+            waiting = True
+            if self._tx_lease.reserve(dev_id, int(time.time())):
+                self._tx_ctr_store.mark_dirty()
+        if waiting:
+            await self._tx_ctr_store.async_flush()
+
+    # ── Write-behind coalescing ──────────────────────────────────────────
+
+    def _send_coalesced(self, dev_id: str, dev_class: str, payload: dict[str, Any], store_last: bool) -> None:
+        key = (dev_id, dev_class)
+        wb = self._write_behind.get(key)
+        if wb is None:
+            wb = self._write_behind[key] = _WriteBehind()
+
+        if wb.timer is None and dev_id not in self._cmd_inflight:
+            wb.pending = (payload, store_last)
+            self._write_behind_flush(key, wb)
+            return
+
+        if wb.pending is not None:
+            self._coalesce_merged += 1
+        wb.pending = (dict(payload), store_last)
+
+    def _write_behind_due(self, key: tuple[str, str]) -> None:
+        wb = self._write_behind.get(key)
+        if wb is None:
+            return
+        wb.timer = None
+        self._write_behind_flush(key, wb)
+
+    def _write_behind_flush(self, key: tuple[str, str], wb: _WriteBehind) -> None:
+        """Send the held payload if the interval and any in-flight ack allow it."""
+        if wb.timer is not None or key[0] in self._cmd_inflight:
+            return
+        if wb.pending is None:
+            del self._write_behind[key]
+            return
+
+        payload, store_last = wb.pending
+        wb.pending = None
+        self._coalesce_sent += 1
+        self._send_command(key[0], key[1], payload, store_last=store_last)
+
+        if self.command_interval > 0:
+            wb.timer = self.hass.loop.call_later(self.command_interval, self._write_behind_due, key)
+        elif key[0] not in self._cmd_inflight:
+            del self._write_behind[key]
+
+    def _write_behind_resume(self, dev_id: str) -> None:
+        """The device's in-flight command finished; flush what it was holding."""
+        for key, wb in list(self._write_behind.items()):
+            if key[0] == dev_id:
+                self._write_behind_flush(key, wb)
+
+    def command_stats(self) -> dict[str, int]:
+        return {
+            "coalesce_sent": self._coalesce_sent,
+            "coalesce_merged": self._coalesce_merged,
+            "coalesce_held": sum(1 for wb in self._write_behind.values() if wb.pending is not None),
+            "inflight": len(self._cmd_inflight),
+        }
+
+    # ── Pipeline counters ────────────────────────────────────────────────
+
+    def _dev_count(self, dev_id: str, name: str) -> None:
+        c = self._dev_counters.get(dev_id)
+        if c is None:
+            c = self._dev_counters[dev_id] = Counter()
+        c[name] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Bump a pipeline counter on behalf of a platform."""
+        self._counters[name] += n
+
+    def _drop(self, reason: str, dev_id: str | None = None) -> None:
+        self._drops[reason] += 1
+        if dev_id is not None:
+            self._dev_count(dev_id, "rx_dropped")
+
+    def pipeline_stats(self) -> dict[str, Any]:
+        """Totals, RX drops by reason and per-device counts since start."""
+        return {
+            "totals": dict(self._counters),
+            "drops": dict(self._drops),
+            "devices": {d: dict(c) for d, c in self._dev_counters.items()},
+        }
+
+    # ── Command latency ──────────────────────────────────────────────────
+
+    def _record_latency(self, dev_id: str) -> None:
+        elapsed = time.monotonic() - self._latency_sent.pop(dev_id)
+        if elapsed > LATENCY_MAX:
+            return
+        hist = self._latency.get(dev_id)
+        if hist is None:
+            hist = self._latency[dev_id] = _LatencyHistogram()
+        hist.add(elapsed * 1000.0)
+
+    def latency_stats(self, dev_id: str | None = None) -> dict[str, Any]:
+        """Round-trip summary for one device, or all devices keyed by id."""
+        if dev_id is not None:
+            hist = self._latency.get(dev_id)
+            return hist.summary() if hist else _LatencyHistogram().summary()
+        return {d: h.summary() for d, h in self._latency.items()}
+
+    # ── Command acks / retransmit ────────────────────────────────────────
+
+    def _rtt_for(self, dev_id: str) -> _RttEstimator:
+        est = self._rtt.get(dev_id)
+        if est is None:
+            est = self._rtt[dev_id] = _RttEstimator()
+        return est
+
+    def _arm_retransmit(self, pend: _PendingCommand) -> None:
+        pend.timer = self.hass.loop.call_later(
+            self._rtt_for(pend.dev_id).rto, self._on_retransmit_timer, pend
+        )
+
+    def _on_retransmit_timer(self, pend: _PendingCommand) -> None:
+        if self._cmd_inflight.get(pend.dev_id) is not pend:
+            return
+        self._rtt_for(pend.dev_id).backoff()
+
+        if pend.attempts >= CMD_MAX_ATTEMPTS:
+            _LOGGER.debug("ET-Bus: no ack from %s for %s after %d attempts", pend.dev_id, pend.cid, pend.attempts)
+            self._finish_command(pend.dev_id, "timeout")
+            return
+
+        ip = (self.devices.get(pend.dev_id) or {}).get("ip")
+        if ip:
+            pend.attempts += 1
+            self._udp_send_bytes(ip, self.port, pend.data)
+            self._dev_count(pend.dev_id, "tx_retransmits")
+        self._arm_retransmit(pend)
+
+    def _on_ack(self, dev_id: str, payload: Any) -> None:
+        pend = self._cmd_inflight.get(dev_id)
+        if pend is None or not isinstance(payload, dict) or payload.get("cmd") != pend.cid:
+            return
+
+        # Karn: an ack after a retransmit is ambiguous, so it is not sampled
+        rtt: float | None = None
+        if pend.attempts == 1:
+            rtt = time.monotonic() - pend.sent_ts
+            self._rtt_for(dev_id).sample(rtt)
+
+        self._finish_command(dev_id, "acked" if payload.get("ok", True) else "rejected", rtt)
+
+    def _finish_command(self, dev_id: str, status: str, rtt: float | None = None) -> None:
+        pend = self._cmd_inflight.pop(dev_id, None)
+        if pend is None:
+            return
+        if pend.timer:
+            pend.timer.cancel()
+        if not pend.future.done():
+            pend.future.set_result(CommandResult(dev_id, status, pend.attempts, rtt))
+        if status in ("acked", "rejected", "timeout") and self._write_behind:
+            self._write_behind_resume(dev_id)
+
+    def _remember_command(self, dev_id: str, dev_class: str, payload: dict[str, Any] | None) -> None:
+        self._last_command[dev_id] = {
+            "dev_class": dev_class,
+            "payload": payload.copy() if payload else {}
+        }
+        # Persist to disk so we survive HA restarts
+        self._store.mark_dirty()
+
+    async def async_send_bulk(self, commands: list[dict[str, Any]], *, store_last: bool = True) -> int:
+        """Send commands for many devices in as few multicast frames as possible.
+
+        Each command is {"id": dev_id, "class": dev_class, "payload": {...}}.
+        Devices that advertise the "bulk" feature get one section each in a
+        shared frame (encrypted with their own key); anything else falls back
+        to a unicast send_command. Returns the number of datagrams sent.
+        """
+        sections: list[bytes] = []
+        unicast = 0
+
+        if self.crypto_enabled and self.master_secret:
+            await self._async_ensure_leases(str(cmd.get("id")) for cmd in commands if cmd.get("id") in self.devices)
+
+        for cmd in commands:
+            dev_id = str(cmd.get("id", "") or "")
+            dev_class = str(cmd.get("class", "") or "")
+            payload = cmd.get("payload") or {}
+            if not dev_id or not isinstance(payload, dict):
+                continue
+
+            info = self.devices.get(dev_id) or {}
+            if not info.get("ip"):
+                _LOGGER.warning("ET-Bus: no IP for %s", dev_id)
+                continue
+
+            if FEATURE_BULK not in (info.get("features") or ()):
+                self.send_command(dev_id, dev_class, payload, store_last=store_last)
+                unicast += 1
+                continue
+
+            if self.crypto_enabled:
+                body = self._encrypt_command(dev_id=dev_id, plain=payload)
+                if body is None:
+                    continue
+            else:
+                body = codec.dumps(payload)
+
+            if store_last:
+                self._remember_command(dev_id, dev_class, payload)
+            # Bulk sections carry no command id, so they are not tracked
+            self._finish_command(dev_id, "superseded")
+            self._dev_count(dev_id, "tx_commands")
+            self._latency_sent.setdefault(dev_id, time.monotonic())
+            sections.append(
+                b'{"to":' + codec.dumps(dev_id) + b',"class":' + codec.dumps(dev_class) + b',"payload":' + body + b"}"
+            )
+
+        frames = self._pack_bulk_frames(sections)
+        for frame in frames:
+            self._udp_send_bytes(DEFAULT_HOST_MCAST, int(self.port), frame)
+
+        _LOGGER.debug(
+            "ET-Bus bulk: %d sections in %d frames, %d unicast fallbacks",
+            len(sections), len(frames), unicast,
+        )
+        return len(frames) + unicast
+
+    def _pack_bulk_frames(self, sections: list[bytes]) -> list[bytes]:
+        """Greedily pack sections into frames no larger than BULK_FRAME_MAX."""
+        head = {"v": 1, "type": "bulk", "id": self.hub_id, "class": "hub"}
+        # envelope + '{"cmds":[' + ']}'
+        overhead = len(codec.envelope(head, b"")) + 11
+
+        frames: list[bytes] = []
+        batch: list[bytes] = []
+        size = overhead
+        for sec in sections:
+            if batch and (size + len(sec) + 1 > BULK_FRAME_MAX or len(batch) >= BULK_MAX_SECTIONS):
+                frames.append(codec.envelope(head, b'{"cmds":[' + b",".join(batch) + b"]}"))
+                batch = []
+                size = overhead
+            batch.append(sec)
+            size += len(sec) + 1
+        if batch:
+            frames.append(codec.envelope(head, b'{"cmds":[' + b",".join(batch) + b"]}"))
+        return frames
+
+    def _encode_command_v1(
+        self, dev_id: str, dev_class: str, payload: dict[str, Any], cid: str | None = None
+    ) -> bytes | None:
+        head: dict[str, Any] = {
             "v": 1,
             "type": "command",
             "id": self.hub_id,
             "class": dev_class,
-            "payload": payload or {},
         }
+        if cid:
+            head["cid"] = cid
 
         if self.crypto_enabled:
-            wrapper = self._encrypt_command(dev_id=dev_id, plain=payload or {})
-            if wrapper is None:
-                return
-            msg["payload"] = wrapper
+            body = self._encrypt_command(dev_id=dev_id, plain=payload)
+            if body is None:
+                return None
+        else:
+            body = codec.dumps(payload)
+
+        return codec.envelope(head, body)
 
-        self._udp_send(ip, self.port, msg)
+    def _encode_command_v2(
+        self, dev_id: str, dev_class: str, payload: dict[str, Any], cid: str | None = None
+    ) -> bytes | None:
+        if not self.crypto_enabled:
+            return codec.encode_v2("command", self.hub_id, dev_class, payload=payload, cid=cid)
 
-    def _encrypt_command(self, *, dev_id: str, plain: dict[str, Any]) -> dict[str, Any] | None:
-        if not self.crypto_enabled or not self.master_secret or ChaCha20Poly1305 is None:
+        sealed = self._seal_command(dev_id, codec.packb(payload))
+        if sealed is None:
             return None
+        ctr, nonce, ct, tag = sealed
+        return codec.encode_v2("command", self.hub_id, dev_class, sealed=(self.kid, ctr, nonce, ct, tag), cid=cid)
 
-        key = self._derive_key_for_dev(dev_id)
-        if not key:
+    def _encrypt_command(self, *, dev_id: str, plain: dict[str, Any]) -> bytes | None:
+        """Encrypt a command payload and return the encoded v1 wrapper object."""
+        sealed = self._seal_command(dev_id, codec.dumps(plain))
+        if sealed is None:
+            return None
+        ctr, nonce, ct, tag = sealed
+
+        # base64 output is plain ASCII, so the wrapper is formatted directly
+        return b'{"_enc":1,"kid":%d,"ctr":%d,"nonce":"%s","ct":"%s","tag":"%s"}' % (
+            self.kid,
+            ctr,
+            base64.b64encode(nonce),
+            base64.b64encode(ct),
+            base64.b64encode(tag),
+        )
+
+    def _seal_command(self, dev_id: str, pt: bytes) -> tuple[int, bytes, bytes, bytes] | None:
+        """Encrypt command plaintext under the next leased counter: (ctr, nonce, ct, tag)."""
+        if not self.crypto_enabled or not self.master_secret:
             return None
 
-        if dev_id in self._tx_ctr:
-            ctr = int(self._tx_ctr.get(dev_id, 0) + 1)
-        else:
-            # First run after upgrading from the old in-memory counter.
-            # Use a high monotonic-enough value so ESP nodes with an old
-            # remembered command counter do not reject HA as a replay.
-            ctr = int(time.time())
-        self._tx_ctr[dev_id] = ctr
-        self._schedule_save_tx_counters()
+        aead = self._aead_for_dev(dev_id)
+        if aead is None:
+            return None
+
+        ctr, renewed = self._tx_lease.next(dev_id)
+        if renewed:
+            self._tx_ctr_store.flush_soon()
+        if ctr is None:
+            _LOGGER.warning("ETBUS no persisted tx counter lease for %s", dev_id)
+            return None
 
         nonce = self._nonce_cmd(ctr)
-        pt = json.dumps(plain, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
         try:
-            aead = ChaCha20Poly1305(key)
             out = aead.encrypt(nonce, pt, None)
-            ct, tag = out[:-16], out[-16:]
         except Exception as e:
             _LOGGER.warning("ETBUS ENC FAIL dev=%s ctr=%s err=%r", dev_id, ctr, e)
             return None
 
+        return ctr, nonce, out[:-16], out[-16:]
+
+    # ── Liveness ─────────────────────────────────────────────────────────
+
+    def _liveness_touch(self, dev_id: str, mtype: str) -> None:
+        """Push the device's offline deadline out; O(1) unless it moved earlier."""
+        now = self.hass.loop.time()
+        live = self._liveness.get(dev_id)
+        if live is None:
+            live = self._liveness[dev_id] = _Liveness()
+        if mtype == "pong":
+            live.pong(now)
+        live.heard = now
+        live.deadline = now + live.timeout
+        # The queued entry is re-armed lazily when it fires; only a deadline
+        # that moved earlier (timeout shrank) needs an entry of its own
+        if live.queued_at is None or live.deadline < live.queued_at:
+            self._liveness_push(dev_id, live)
+
+    def _liveness_push(self, dev_id: str, live: _Liveness) -> None:
+        live.queued_at = live.deadline
+        heapq.heappush(self._liveness_heap, (live.deadline, dev_id))
+        if self._liveness_timer_at is None or live.deadline < self._liveness_timer_at:
+            self._liveness_arm()
+
+    def _liveness_arm(self) -> None:
+        if self._liveness_timer:
+            self._liveness_timer.cancel()
+        self._liveness_timer = None
+        self._liveness_timer_at = None
+        if self._liveness_heap:
+            when = self._liveness_heap[0][0]
+            self._liveness_timer = self.hass.loop.call_at(when, self._on_liveness_timer)
+            self._liveness_timer_at = when
+
+    def _on_liveness_timer(self) -> None:
+        self._liveness_timer = None
+        self._liveness_timer_at = None
+        now = self.hass.loop.time()
+        heap = self._liveness_heap
+        while heap and heap[0][0] <= now:
+            when, dev_id = heapq.heappop(heap)
+            live = self._liveness.get(dev_id)
+            if live is None or live.queued_at != when:
+                continue  # superseded by an earlier entry
+            if live.deadline > now:
+                live.queued_at = live.deadline
+                heapq.heappush(heap, (live.deadline, dev_id))
+                continue
+            live.queued_at = None
+            self._mark_offline(dev_id, live)
+        self._liveness_arm()
+
+    def _mark_offline(self, dev_id: str, live: _Liveness) -> None:
+        info = self.devices.get(dev_id)
+        if info is None or not info.get("online", True):
+            return
+        info["online"] = False
+        self._fleet_changed = True
+        _LOGGER.debug("ET-Bus device %s offline (silent %.1fs)", dev_id, live.timeout)
+        self._counters["events_status"] += 1
+        self.hass.bus.async_fire(EVENT_DEVICE_STATUS, {
+            "id": dev_id,
+            "online": False,
+            "reason": "offline"
+        })
+
+    def liveness_stats(self) -> dict[str, dict[str, Any]]:
+        """Per-device pong cadence and the offline timeout derived from it."""
+        now = self.hass.loop.time()
         return {
-            "_enc": 1,
-            "kid": int(ETBUS_KID),
-            "ctr": int(ctr),
-            "nonce": _b64e(nonce),
-            "ct": _b64e(ct),
-            "tag": _b64e(tag),
+            dev_id: {
+                "pong_gap": round(live.gap, 2),
+                "jitter": round(live.jitter, 2),
+                "samples": live.samples,
+                "timeout": round(live.timeout, 1),
+                "expires_in": round(live.deadline - now, 1),
+            }
+            for dev_id, live in self._liveness.items()
         }
 
     async def _ping_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_ping = loop.time() + self._ping_period
+        elapsed = 0.0
         while True:
-            await asyncio.sleep(float(PING_INTERVAL))
-
-            now = _now()
-            for dev_id, info in list(self.devices.items()):
-                last = float(info.get("last_seen", 0.0) or 0.0)
-                online = bool(info.get("online", True))
-                if online and last and (now - last) > float(OFFLINE_TIMEOUT):
-                    info["online"] = False
-                    self.hass.bus.async_fire("etbus_device_status", {
-                        "id": dev_id,
-                        "online": False,
-                        "reason": "offline"
-                    })
-
-            self._send_ping_multicast()
+            # Rounds start every PING_INTERVAL however long the probes took
+            await asyncio.sleep(max(0.0, float(PING_INTERVAL) - elapsed))
+            started = loop.time()
+            if started >= next_ping:
+                self._send_ping_multicast()
+                self._adapt_ping_period()
+                next_ping = started + self._ping_period
+            await self._probe_quiet()
+            elapsed = loop.time() - started
+
+    def _adapt_ping_period(self) -> None:
+        """Back the discovery ping off while no device appeared, left or rebooted."""
+        if self._fleet_changed:
+            period = float(PING_INTERVAL)
+        else:
+            period = min(self._ping_period * 2, PING_INTERVAL_MAX)
+        self._fleet_changed = False
+        if period != self._ping_period:
+            _LOGGER.debug("ET-Bus discovery ping period %.0fs -> %.0fs", self._ping_period, period)
+            self._ping_period = period
+
+    def _resync_spread(self) -> float:
+        return min(max(self.resync_window, 0.0), float(PING_INTERVAL) / 2)
+
+    async def _probe_quiet(self) -> None:
+        """Unicast probe to online devices that went quiet, spread across the window."""
+        now = self.hass.loop.time()
+        targets: list[str] = []
+        avoided = 0
+        for dev_id, info in self.devices.items():
+            live = self._liveness.get(dev_id)
+            if not info.get("ip") or not info.get("online", True) or live is None:
+                continue
+            if live.quiet(now):
+                targets.append(info["ip"])
+            else:
+                avoided += 1
+        self._counters["probes_avoided"] += avoided
+        if not targets:
+            return
+        spread = self._resync_spread()
+        slots = max(1, int(spread / RESYNC_SLOT))
+        per_slot = -(-len(targets) // slots)
+        for i in range(0, len(targets), per_slot):
+            if i:
+                await asyncio.sleep(RESYNC_SLOT)
+            for ip in targets[i:i + per_slot]:
+                self._send_probe(ip)
+        self._counters["probes_sent"] += len(targets)
+
+    def _welcome(self, dev_id: str, ip: str) -> None:
+        """Hand a paced device this hub's session once its features are known."""
+        features = (self.devices.get(dev_id) or {}).get("features")
+        if features is None:
+            return
+        self._welcomed.add(dev_id)
+        if FEATURE_PACED in features:
+            self._send_sync(ip)
+            self._counters["tx_syncs"] += 1
+
+    def _send_sync(self, ip: str) -> None:
+        msg = {"v": 1, "type": "sync", "id": self.hub_id, "class": "hub", "payload": {"session": self._session}}
+        self._udp_send(ip, int(self.port), msg)
+
+    def _send_probe(self, ip: str) -> None:
+        # Paced firmware answers a probe with a pong only; older firmware
+        # treats it as a normal ping
+        msg = {
+            "v": 1,
+            "type": "ping",
+            "id": self.hub_id,
+            "class": "hub",
+            "payload": {"port": int(self.port), "features": [codec.FEATURE_V2], "probe": True, "session": self._session},
+        }
+        self._udp_send(ip, int(self.port), msg)
 
     def _send_startup_ping(self) -> None:
         msg = {
@@ -578,6 +2121,8 @@ class EtBusHub:
                 "port": int(self.port),
                 "ts": self._hub_start_time,
                 "startup": True,
+                "features": [codec.FEATURE_V2],
+                "jitter": int(self._resync_spread() * 1000),
             },
         }
         self._udp_send(DEFAULT_HOST_MCAST, int(self.port), msg, multicast=True)
@@ -589,15 +2134,34 @@ class EtBusHub:
             "type": "ping",
             "id": self.hub_id,
             "class": "hub",
-            "payload": {"port": int(self.port), "ts": int(time.time())},
+            "payload": {
+                "port": int(self.port),
+                "ts": int(time.time()),
+                "features": [codec.FEATURE_V2],
+                # Devices holding this session stay quiet; the rest answer spread out
+                "unknown_only": True,
+                "session": self._session,
+                "jitter": int(self._resync_spread() * 1000),
+            },
         }
         self._udp_send(DEFAULT_HOST_MCAST, int(self.port), msg, multicast=True)
 
     def _udp_send(self, ip: str, port: int, msg: dict[str, Any], multicast: bool = False) -> None:
-        if not self._sock:
+        self._udp_send_bytes(ip, port, codec.dumps(msg))
+
+    def _udp_send_bytes(self, ip: str, port: int, data: bytes) -> None:
+        counters = self._counters
+        if not self._transport:
+            counters["tx_errors"] += 1
             return
-        data = json.dumps(msg, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
         try:
-            self._sock.sendto(data, (ip, port))
-        except Exception:
-            pass
+            self._transport.sendto(data, (ip, port))
+        except Exception as e:
+            counters["tx_errors"] += 1
+            _LOGGER.debug("ET-Bus TX error to %s: %r", ip, e)
+            return
+        counters["tx_packets"] += 1
+        counters["tx_bytes"] += len(data)
+        if ip == DEFAULT_HOST_MCAST:
+            # Multicast loopback hands this straight back to our own socket
+            self._rx_filter.sent(data, time.monotonic())
@@ -75,6 +75,20 @@ async def async_setup_entry(
     hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
     entities: dict[str, EtBusRgbLight] = {}
 
+    # Re-create cached lights up front, seeded with their last reported state
+    for dev_id, dev_class, desc in hub.known_devices("light.rgb"):
+        if dev_class != "light.rgb":
+            continue
+        saved = hub.get_last_reported_state(dev_id)
+        if saved and saved.get("dev_class") != dev_class:
+            saved = None
+        entities[dev_id] = EtBusRgbLight(
+            hub, dev_id, desc.get("name", dev_id), desc.get("effects") or DEFAULT_EFFECTS, saved, restored=True
+        )
+    if entities:
+        async_add_entities(list(entities.values()))
+        _LOGGER.debug("ET-Bus: restored %d RGB lights from discovery cache", len(entities))
+
     @callback
     def handle_message(msg: dict[str, Any]) -> None:
         if msg.get("v") != 1:
@@ -100,10 +114,15 @@ async def async_setup_entry(
                 async_add_entities([ent])
                 _LOGGER.debug("ET-Bus: discovered RGB light %s with %s effects", dev_id, len(effects))
 
-            # Always update HA entity from device-reported state
-            entities[dev_id].handle_state(payload)
+            # Device-reported state updates the entity; discover/pong only confirm it is there
+            if mtype == "state":
+                entities[dev_id].handle_state(payload)
+            else:
+                entities[dev_id].confirm()
 
-    hub.register_listener(handle_message)
+    entry.async_on_unload(
+        hub.register_listener(handle_message, class_prefix="light.rgb", msg_types=("discover", "state", "pong"), name="light")
+    )
 
 
 class EtBusRgbLight(LightEntity):
@@ -119,10 +138,13 @@ class EtBusRgbLight(LightEntity):
         name: str,
         effects: list[str],
         saved_state: dict[str, Any] | None = None,
+        restored: bool = False,
     ):
         self._hub = hub
         self._dev_id = dev_id
         self._attr_name = name
+        # Nothing heard from a cache-built light yet
+        self._attr_assumed_state = restored
 
         # Default state
         self._is_on = False
@@ -156,7 +178,7 @@ class EtBusRgbLight(LightEntity):
     # -------------------
     @property
     def available(self) -> bool:
-        return bool(self._hub.devices.get(self._dev_id, {}).get("online", True))
+        return self._hub.device_available(self._dev_id)
 
     @property
     def is_on(self) -> bool:
@@ -211,6 +233,7 @@ class EtBusRgbLight(LightEntity):
 
     def handle_state(self, payload: dict[str, Any]) -> None:
         """Update entity from device-reported state."""
+        self._attr_assumed_state = False
         self._apply_payload(payload)
 
         # Dynamically add new effects if device reports them
@@ -220,7 +243,16 @@ class EtBusRgbLight(LightEntity):
                 self._effect_list.append(eff)
                 _LOGGER.debug("ET-Bus light %s: learned new effect '%s'", self._dev_id, eff)
 
-        self.async_write_ha_state()
+        if self.hass is not None:
+            self.async_write_ha_state()
+
+    def confirm(self) -> None:
+        """The device answered: drop the assumed flag from a restored entity."""
+        if not self._attr_assumed_state:
+            return
+        self._attr_assumed_state = False
+        if self.hass is not None:
+            self.async_write_ha_state()
 
     # -------------------
     # HA → device (only when user explicitly acts)
@@ -261,5 +293,5 @@ class EtBusRgbLight(LightEntity):
             "effect": self._effect,
             "speed": int(self._speed),
         }
-        self._hub.send_command(self._dev_id, "light.rgb", payload)
+        self._hub.send_command(self._dev_id, "light.rgb", payload, coalesce=True)
         _LOGGER.debug("ET-Bus light %s: sent command %s", self._dev_id, payload)
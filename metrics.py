@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import voluptuous as vol
+from aiohttp import web
+from homeassistant.components import websocket_api
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+METRICS_URL = f"/api/{DOMAIN}/metrics"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# hub total -> (metric name, type, help)
+_TOTALS: dict[str, tuple[str, str, str]] = {
+    "rx_packets": ("etbus_rx_packets", "counter", "Datagrams received"),
+    "rx_bytes": ("etbus_rx_bytes", "counter", "Bytes received"),
+    "rx_parse_errors": ("etbus_rx_parse_errors", "counter", "Datagrams that did not decode"),
+    "rx_decrypted": ("etbus_rx_decrypted", "counter", "Encrypted payloads opened"),
+    "rx_reordered": ("etbus_rx_reordered", "counter", "Encrypted payloads accepted out of order"),
+    "rx_ctr_resets": ("etbus_rx_ctr_resets", "counter", "Device state counter restarts accepted"),
+    "rx_dispatched": ("etbus_rx_dispatched", "counter", "Messages delivered to listeners"),
+    "rx_handler_errors": ("etbus_rx_handler_errors", "counter", "Exceptions while handling a message"),
+    "rx_batches": ("etbus_rx_batches", "counter", "RX batches processed"),
+    "rx_batch_seconds": ("etbus_rx_batch_seconds", "counter", "Time spent processing RX batches"),
+    "dispatch_seconds": ("etbus_dispatch_seconds", "counter", "Time spent in listener dispatch"),
+    "tx_packets": ("etbus_tx_packets", "counter", "Datagrams sent"),
+    "tx_bytes": ("etbus_tx_bytes", "counter", "Bytes sent"),
+    "tx_errors": ("etbus_tx_errors", "counter", "Sends that failed or had no transport"),
+    "tx_syncs": ("etbus_tx_syncs", "counter", "Session syncs sent to paced devices"),
+    "probes_sent": ("etbus_probes_sent", "counter", "Unicast liveness probes sent to quiet devices"),
+    "probes_avoided": ("etbus_probes_avoided", "counter", "Liveness probes skipped thanks to recent traffic"),
+    "events_message": ("etbus_events_message", "counter", "etbus_message events fired"),
+    "events_message_rate_limited": ("etbus_events_message_rate_limited", "counter", "etbus_message events over the rate cap"),
+    "events_status": ("etbus_events_status", "counter", "etbus_device_status events fired"),
+    "sensor_values_received": ("etbus_sensor_values_received", "counter", "Sensor values received"),
+    "sensor_values_written": ("etbus_sensor_values_written", "counter", "Sensor values written to HA state"),
+}
+
+
+def _hubs(hass: HomeAssistant) -> dict[str, Any]:
+    return {k: v for k, v in (hass.data.get(DOMAIN) or {}).items() if hasattr(v, "pipeline_stats")}
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_openmetrics(hubs: dict[str, Any]) -> str:
+    """OpenMetrics text for every hub, labelled by config entry id."""
+    stats = {entry_id: hub.pipeline_stats() for entry_id, hub in hubs.items()}
+    lines: list[str] = []
+
+    for key, (name, mtype, help_) in _TOTALS.items():
+        lines.append(f"# TYPE {name} {mtype}")
+        lines.append(f"# HELP {name} {help_}")
+        for entry_id, s in stats.items():
+            lines.append(f'{name}_total{{entry="{_label(entry_id)}"}} {s["totals"].get(key, 0)}')
+
+    lines.append("# TYPE etbus_rx_dropped counter")
+    lines.append("# HELP etbus_rx_dropped Messages dropped, by reason")
+    for entry_id, s in stats.items():
+        for reason, n in sorted(s["drops"].items()):
+            lines.append(f'etbus_rx_dropped_total{{entry="{_label(entry_id)}",reason="{_label(reason)}"}} {n}')
+
+    lines.append("# TYPE etbus_device counter")
+    lines.append("# HELP etbus_device Per-device packet counts")
+    for entry_id, s in stats.items():
+        for dev_id, counts in sorted(s["devices"].items()):
+            for key, n in sorted(counts.items()):
+                lines.append(
+                    f'etbus_device_total{{entry="{_label(entry_id)}",device="{_label(dev_id)}",'
+                    f'kind="{_label(key)}"}} {n}'
+                )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class EtBusMetricsView(HomeAssistantView):
+    """OpenMetrics scrape endpoint for hub pipeline counters."""
+
+    url = METRICS_URL
+    name = "api:etbus:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        hass: HomeAssistant = request.app["hass"]
+        body = render_openmetrics(_hubs(hass))
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": OPENMETRICS_CONTENT_TYPE})
+
+
+@websocket_api.websocket_command({vol.Required("type"): "etbus/stats"})
+@callback
+def ws_stats(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    connection.send_result(msg["id"], {entry_id: hub.pipeline_stats() for entry_id, hub in _hubs(hass).items()})
+
+
+def async_setup_metrics(hass: HomeAssistant) -> None:
+    """Register the metrics view and websocket command (once per HA run)."""
+    if hass.data.get(f"{DOMAIN}_metrics_loaded"):
+        return
+    hass.http.register_view(EtBusMetricsView)
+    websocket_api.async_register_command(hass, ws_stats)
+    hass.data[f"{DOMAIN}_metrics_loaded"] = True
+    _LOGGER.debug("ET-Bus metrics registered at %s", METRICS_URL)
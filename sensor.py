@@ -1,25 +1,28 @@
 from __future__ import annotations
 
 import logging
+import math
+import time
 from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
+    EntityCategory,
     UnitOfTemperature,
+    UnitOfTime,
     PERCENTAGE,
     CONCENTRATION_PARTS_PER_MILLION,
 )
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from .const import DOMAIN
+from .const import CONF_LATENCY_SENSORS, CONF_SENSOR_FILTERS, DOMAIN
 from .hub import EtBusHub
+from .sensor_filters import DEFAULT_FILTER, WriteFilter, parse_sensor_filters, resolve_filter
 
 _LOGGER = logging.getLogger(__name__)
-
-_ENTITIES: dict[str, "EtBusValueSensor"] = {}
 
 _SKIP_PAYLOAD_KEYS = {
     "unit",
@@ -66,17 +69,57 @@ _SENSOR_META = {
 }
 
 
+_WINDOW_CHILD_STATS = ("min", "max", "count")
+
+
+class _WindowStats:
+    """Running count/sum/min/max/last for one window: constant size at any rate."""
+
+    __slots__ = ("count", "total", "min", "max", "last")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.last = 0.0
+
+    def add(self, v: float) -> None:
+        self.count += 1
+        self.total += v
+        if v < self.min:
+            self.min = v
+        if v > self.max:
+            self.max = v
+        self.last = v
+
+
 def _endpoint_from_class(cls: str) -> str:
     return cls.replace(".", "_")
 
 
-def _entity_key(entry_id: str, dev_id: str, endpoint: str, metric: str) -> str:
-    return f"{entry_id}:{dev_id}:{endpoint}:{metric}"
+def _entity_key(endpoint: str, metric: str) -> str:
+    return f"{endpoint}:{metric}"
+
+
+@dataclass
+class _DecodePlan:
+    """Pre-resolved (payload key, entity) pairs for one (device, class, key-set)."""
+
+    steps: tuple[tuple[str, "EtBusValueSensor"], ...]
+    deferred: tuple[str, ...]  # keys skipped at compile time because they were empty/structured
+
+
+_MAX_PLANS = 4096
 
 
 @dataclass
 class _Msg:
-    entry_id: str
+    entities: dict[str, "EtBusValueSensor"]  # this device's sensors, by _entity_key
+    overrides: dict[str, dict[str, dict[str, float]]]
     dev_id: str
     cls: str
     payload: dict[str, Any]
@@ -89,6 +132,53 @@ async def async_setup_entry(
 ) -> None:
     hub: EtBusHub = hass.data[DOMAIN][entry.entry_id]
 
+    # dev_id -> entity key -> sensor, scoped to this config entry
+    index: dict[str, dict[str, EtBusValueSensor]] = {}
+    # (dev_id, class, payload keys) -> compiled decode plan
+    plans: dict[tuple[str, str, tuple[str, ...]], _DecodePlan] = {}
+
+    def _load_overrides() -> dict[str, dict[str, dict[str, float]]]:
+        try:
+            return parse_sensor_filters(str(entry.options.get(CONF_SENSOR_FILTERS, "") or ""))
+        except ValueError as e:
+            _LOGGER.warning("ET-Bus sensor_filters ignored: %s", e)
+            return {}
+
+    overrides = _load_overrides()
+
+    # Rebuild cached sensors from their recorded metrics and last values
+    restored: list[SensorEntity] = []
+    for dev_id, cls, desc in hub.known_devices("sensor."):
+        saved = hub.get_last_reported_state(dev_id) or {}
+        values = saved.get("payload") if saved.get("dev_class") == cls else None
+        entities = index.get(dev_id)
+        if entities is None:
+            entities = index[dev_id] = {}
+        _restore_sensors(restored.extend, hub, _Msg(entities, overrides, dev_id, cls, desc), values or {})
+
+    # Latency sensors for devices already known join the same batch
+    latency_devs: set[str] = set()
+    if entry.options.get(CONF_LATENCY_SENSORS, False):
+        latency_devs.update(hub.devices)
+        latency_devs.update(dev_id for dev_id, _cls, _desc in hub.known_devices())
+        latency_devs.discard(hub.hub_id)
+        restored.extend(EtBusLatencySensor(hub, dev_id) for dev_id in sorted(latency_devs))
+
+    if restored:
+        async_add_entities(restored)
+        _LOGGER.debug("ET-Bus: restored %d sensors from discovery cache", len(restored))
+
+    async def _options_updated(hass: HomeAssistant, entry: ConfigEntry) -> None:
+        overrides.clear()
+        overrides.update(_load_overrides())
+        added: list[SensorEntity] = []
+        for entities in index.values():
+            for ent in entities.values():
+                ent.set_filter(resolve_filter(overrides, ent.dev_id, ent.metric, ent.device_class))
+                added.extend(ent.update_window_children())
+        if added:
+            async_add_entities(added)
+
     @callback
     def _on_message(msg: dict[str, Any]) -> None:
         if msg.get("v") != 1:
@@ -107,64 +197,140 @@ async def async_setup_entry(
         if not isinstance(payload, dict):
             return
 
-        _process_state(async_add_entities, hub, _Msg(entry.entry_id, dev_id, cls, payload))
+        plan_key = (dev_id, cls, tuple(payload))
+        plan = plans.get(plan_key)
+        if plan is not None and plan.deferred and _plan_outdated(plan, payload):
+            plan = None
+        if plan is None:
+            entities = index.get(dev_id)
+            if entities is None:
+                entities = index[dev_id] = {}
+            if len(plans) >= _MAX_PLANS:
+                plans.clear()
+            plan = plans[plan_key] = _compile_plan(
+                async_add_entities, hub, _Msg(entities, overrides, dev_id, cls, payload)
+            )
+
+        for key, ent in plan.steps:
+            value = payload[key]
+            if value is None or isinstance(value, (dict, list)):
+                continue
+            ent.handle_value(value)
 
     @callback
     def _on_status(ev) -> None:
         data = ev.data or {}
-        dev_id = data.get("id")
-        if not dev_id:
+        entities = index.get(data.get("id"))
+        if not entities:
             return
-        prefix = f"{entry.entry_id}:{dev_id}:"
-        for k, ent in list(_ENTITIES.items()):
-            if k.startswith(prefix):
-                ent.refresh_availability()
+        for ent in entities.values():
+            if ent.refresh_availability() and ent.hass is not None:
                 ent.async_write_ha_state()
 
-    hub.register_listener(_on_message)
-    hass.bus.async_listen("etbus_device_status", _on_status)
+    entry.async_on_unload(hub.register_listener(_on_message, class_prefix="sensor.", msg_types=("state",), name="sensor"))
+    entry.async_on_unload(hass.bus.async_listen("etbus_device_status", _on_status))
+    entry.async_on_unload(entry.add_update_listener(_options_updated))
+
+    if entry.options.get(CONF_LATENCY_SENSORS, False):
+        @callback
+        def _add_latency_sensor(dev_id: str) -> None:
+            if not dev_id or dev_id == hub.hub_id or dev_id in latency_devs:
+                return
+            latency_devs.add(dev_id)
+            async_add_entities([EtBusLatencySensor(hub, dev_id)])
+
+        entry.async_on_unload(hub.register_listener(
+            lambda msg: _add_latency_sensor(str(msg.get("id", ""))),
+            msg_types=("discover", "pong", "state"),
+            name="sensor.latency",
+        ))
 
     _LOGGER.debug("ET-Bus sensor platform ready")
 
 
-@callback
-def _process_state(async_add_entities: AddEntitiesCallback, hub: EtBusHub, m: _Msg) -> None:
+def _compile_plan(async_add_entities: AddEntitiesCallback, hub: EtBusHub, m: _Msg) -> _DecodePlan:
+    """Resolve which payload keys feed which entities, creating missing ones.
+
+    Units are applied here once; keys whose value is empty or structured
+    right now are deferred and trigger a re-plan when they turn scalar.
+    """
     endpoint = _endpoint_from_class(m.cls)
+    steps: list[tuple[str, EtBusValueSensor]] = []
+    deferred: list[str] = []
 
     # single-value payload style
     if "value" in m.payload:
         metric = m.cls.replace("sensor.", "") or "value"
-        _get_or_create_and_update(async_add_entities, hub, m, endpoint, metric, m.payload.get("value"), m.payload)
-        return
+        steps.append(("value", _get_or_create(async_add_entities, hub, m, endpoint, metric, "value")))
+        return _DecodePlan(tuple(steps), ())
 
     # multi-metric payload style
     for metric, value in m.payload.items():
         if str(metric).lower() in _SKIP_PAYLOAD_KEYS:
             continue
         if value is None or isinstance(value, (dict, list)):
+            deferred.append(metric)
             continue
-        _get_or_create_and_update(async_add_entities, hub, m, endpoint, str(metric), value, m.payload)
+        steps.append((metric, _get_or_create(async_add_entities, hub, m, endpoint, str(metric), metric)))
+
+    _LOGGER.debug("ET-Bus sensor plan %s/%s: %d keys, %d deferred", m.dev_id, m.cls, len(steps), len(deferred))
+    return _DecodePlan(tuple(steps), tuple(deferred))
+
 
+def _restore_sensors(
+    async_add_entities: AddEntitiesCallback, hub: EtBusHub, m: _Msg, values: dict[str, Any]
+) -> None:
+    """Create a device's cached sensors without waiting for its next state.
 
-def _get_or_create_and_update(
+    m.payload is the discovery-cache descriptor; its "metrics" are the keys
+    that carried scalar values, and its unit fields apply as usual.
+    """
+    endpoint = _endpoint_from_class(m.cls)
+    metrics = m.payload.get("metrics") or ()
+    if "value" in metrics:
+        metrics = ("value",)
+    for key in metrics:
+        if key == "value":
+            metric = m.cls.replace("sensor.", "") or "value"
+        elif str(key).lower() in _SKIP_PAYLOAD_KEYS:
+            continue
+        else:
+            metric = str(key)
+        _get_or_create(async_add_entities, hub, m, endpoint, metric, key).restore(values.get(key))
+
+
+def _plan_outdated(plan: _DecodePlan, payload: dict[str, Any]) -> bool:
+    for key in plan.deferred:
+        value = payload[key]
+        if value is not None and not isinstance(value, (dict, list)):
+            return True
+    return False
+
+
+def _get_or_create(
     async_add_entities: AddEntitiesCallback,
     hub: EtBusHub,
     m: _Msg,
     endpoint: str,
     metric: str,
-    value: Any,
-    payload: dict[str, Any],
-) -> None:
-    k = _entity_key(m.entry_id, m.dev_id, endpoint, metric)
+    key: str,
+) -> EtBusValueSensor:
+    k = _entity_key(endpoint, metric)
 
-    ent = _ENTITIES.get(k)
+    ent = m.entities.get(k)
     if ent is None:
         ent = EtBusValueSensor(hub, m.dev_id, m.cls, endpoint, metric)
-        _ENTITIES[k] = ent
-        async_add_entities([ent])
-        _LOGGER.debug("ET-Bus created sensor: %s", k)
+        ent.set_filter(resolve_filter(m.overrides, m.dev_id, metric, ent.device_class))
+        m.entities[k] = ent
+        async_add_entities([ent, *ent.update_window_children()])
+        _LOGGER.debug("ET-Bus created sensor: %s:%s", m.dev_id, k)
 
-    ent.handle_value(value, payload)
+    unit = None
+    units = m.payload.get("units")
+    if isinstance(units, dict):
+        unit = units.get(metric)
+    ent.set_unit(unit or m.payload.get("unit"))
+    return ent
 
 
 class EtBusValueSensor(SensorEntity):
@@ -179,6 +345,19 @@ class EtBusValueSensor(SensorEntity):
         self._endpoint = endpoint
         self._metric = metric
         self._native_value = None
+        self._numeric = False
+
+        # Write filtering: what HA last saw, when, and a pending trailing write
+        self._filter = DEFAULT_FILTER
+        self._written_value: Any = None
+        self._written_ts: float | None = None
+        self._trailing: Any = None
+
+        # Windowed aggregation (filter.window > 0)
+        self._window = _WindowStats()
+        self._window_timer: Any = None
+        self._window_attrs: dict[str, Any] | None = None
+        self._window_children: list[EtBusWindowStatSensor] = []
 
         self._attr_unique_id = f"etbus_{dev_id}_{endpoint}_{metric}"
 
@@ -208,23 +387,229 @@ class EtBusValueSensor(SensorEntity):
     def native_value(self):
         return self._native_value
 
-    def refresh_availability(self) -> None:
-        info = self._hub.devices.get(self._dev_id)
-        self._attr_available = bool(info.get("online", True)) if info else True
+    @property
+    def dev_id(self) -> str:
+        return self._dev_id
 
-    def handle_value(self, value: Any, payload: dict[str, Any]) -> None:
-        self._native_value = value
-        self.refresh_availability()
-        self._attr_state_class = "measurement" if isinstance(value, (int, float)) and not isinstance(value, bool) else None
-
-        unit = None
-        units = payload.get("units")
-        if isinstance(units, dict):
-            unit = units.get(self._metric)
-        unit = unit or payload.get("unit")
+    @property
+    def metric(self) -> str:
+        return self._metric
+
+    @property
+    def window_filter(self) -> WriteFilter:
+        return self._filter
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        return self._window_attrs
+
+    def set_filter(self, filt: WriteFilter) -> None:
+        self._filter = filt
+
+    def update_window_children(self) -> list[EtBusWindowStatSensor]:
+        """Match the min/max/count sensors to the filter; returns the ones to add."""
+        wanted = self._filter.window > 0 and self._filter.window_entities
+        if wanted and not self._window_children:
+            self._window_children = [EtBusWindowStatSensor(self, stat) for stat in _WINDOW_CHILD_STATS]
+            return self._window_children
+        if not wanted and self._window_children:
+            for child in self._window_children:
+                if child.hass is not None:
+                    child.hass.async_create_task(child.async_remove())
+            self._window_children = []
+        return []
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+        if self._window_timer is not None:
+            self._window_timer.cancel()
+            self._window_timer = None
+
+    def refresh_availability(self) -> bool:
+        """Re-read availability from the hub; True when it changed."""
+        available = self._hub.device_available(self._dev_id)
+        if available == self._attr_available:
+            return False
+        self._attr_available = available
+        return True
+
+    def set_unit(self, unit: str | None) -> None:
+        """Take the device-reported unit unless one is already known."""
         if unit and not getattr(self, "_attr_native_unit_of_measurement", None):
             self._attr_native_unit_of_measurement = unit
 
+    def restore(self, value: Any) -> None:
+        """Seed a cache-created sensor; it stays assumed until a real value."""
+        self._attr_assumed_state = True
+        if value is None or isinstance(value, (dict, list)):
+            return
+        self._native_value = value
+        self._numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        self._attr_state_class = "measurement" if self._numeric else None
+
+    def handle_value(self, value: Any) -> None:
+        confirmed = self._attr_assumed_state
+        self._attr_assumed_state = False
+        numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if numeric and self._filter.window > 0:
+            self._add_window_sample(float(value))
+            return
+
+        self._native_value = value
+        avail_changed = self.refresh_availability()
+        if numeric != self._numeric:
+            self._numeric = numeric
+            self._attr_state_class = "measurement" if numeric else None
+
+        self._hub.count("sensor_values_received")
+        now = time.monotonic()
+        if self.hass is None:
+            # Not added yet: HA writes the current value when it adds the entity
+            self._written_value = value
+            self._written_ts = now
+            return
+        if avail_changed or confirmed or self._filter_allows(value, now):
+            self._write_state(now)
+
+    def _add_window_sample(self, value: float) -> None:
+        self._window.add(value)
+        self._hub.count("sensor_values_received")
+        if self._window_timer is None:
+            self._numeric = True
+            self._attr_state_class = "measurement"
+            self._window_timer = self._hub.hass.loop.call_later(self._filter.window, self._emit_window)
+
+    @callback
+    def _emit_window(self) -> None:
+        """Publish the window's mean (min/max/last/count as attributes) and reset it."""
+        self._window_timer = None
+        w = self._window
+        if not w.count:
+            return
+        stats: dict[str, Any] = {
+            "min": w.min,
+            "max": w.max,
+            "last": w.last,
+            "count": w.count,
+        }
+        self._native_value = round(w.total / w.count, 4)
+        self._window_attrs = {**stats, "window_s": self._filter.window}
+        w.reset()
+
+        if self.hass is None:
+            return
+        self.refresh_availability()
+        self._write_state(time.monotonic())
+        for child in self._window_children:
+            child.set_stats(stats)
+
+    def _changed(self, value: Any) -> bool:
+        last = self._written_value
+        if (
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            and isinstance(last, (int, float)) and not isinstance(last, bool)
+        ):
+            threshold = max(self._filter.abs_deadband, self._filter.rel_deadband * abs(last))
+            return abs(value - last) > threshold if threshold > 0 else value != last
+        return value != last
+
+    def _filter_allows(self, value: Any, now: float) -> bool:
+        if self._written_ts is None:
+            return True
+        since = now - self._written_ts
+        if not self._changed(value):
+            return self._filter.heartbeat > 0 and since >= self._filter.heartbeat
+        if since >= self._filter.min_interval:
+            return True
+        # Too soon after the last write: make sure the latest value lands
+        # once the interval is over
+        if self._trailing is None:
+            self._trailing = self.hass.loop.call_later(
+                self._filter.min_interval - since, self._write_trailing
+            )
+        return False
+
+    @callback
+    def _write_trailing(self) -> None:
+        self._trailing = None
+        if self.hass is not None and self._changed(self._native_value):
+            self._write_state(time.monotonic())
+
+    def _write_state(self, now: float) -> None:
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+        self._written_value = self._native_value
+        self._written_ts = now
+        self._hub.count("sensor_values_written")
+        self.async_write_ha_state()
+
+
+class EtBusLatencySensor(SensorEntity):
+    """p95 command round-trip time for one device (polled from the hub)."""
+
+    _attr_should_poll = True
+    _attr_has_entity_name = True
+    _attr_name = "Command latency"
+    _attr_device_class = "duration"
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_state_class = "measurement"
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, hub: EtBusHub, dev_id: str):
+        self._hub = hub
+        self._dev_id = dev_id
+        self._attr_unique_id = f"etbus_{dev_id}_command_latency"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, dev_id)},
+            "name": dev_id,
+            "manufacturer": "ElectronicsTech",
+        }
+        self._stats: dict[str, Any] = hub.latency_stats(dev_id)
+
+    @property
+    def native_value(self):
+        return self._stats.get("p95_ms")
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        return self._stats
+
+    async def async_update(self) -> None:
+        self._stats = self._hub.latency_stats(self._dev_id)
+
+
+class EtBusWindowStatSensor(SensorEntity):
+    """One statistic (min/max/count) of a windowed EtBusValueSensor."""
+
+    _attr_should_poll = False
+    _attr_has_entity_name = True
+    _attr_state_class = "measurement"
+
+    def __init__(self, parent: EtBusValueSensor, stat: str):
+        self._parent = parent
+        self._stat = stat
+        self._native_value = None
+        self._attr_unique_id = f"{parent.unique_id}_{stat}"
+        self._attr_name = f"{parent.name} {stat}"
+        self._attr_device_info = parent.device_info
+
+    @property
+    def native_value(self):
+        return self._native_value
+
+    # Read through to the parent: its unit may only arrive with a later state
+    @property
+    def device_class(self):
+        return None if self._stat == "count" else self._parent.device_class
+
+    @property
+    def native_unit_of_measurement(self):
+        return None if self._stat == "count" else self._parent.native_unit_of_measurement
+
+    def set_stats(self, stats: dict[str, Any]) -> None:
+        self._native_value = stats.get(self._stat)
         if self.hass is not None:
             self.async_write_ha_state()
-
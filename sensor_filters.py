@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields, replace
+
+
+@dataclass(frozen=True)
+class WriteFilter:
+    """When a received value is worth an HA state write."""
+
+    abs_deadband: float = 0.0   # ignore numeric changes up to this size
+    rel_deadband: float = 0.0   # ... or up to this fraction of the last written value
+    min_interval: float = 0.0   # seconds between writes; later changes are written at the end
+    heartbeat: float = 300.0    # write an unchanged value at least this often (0 = never)
+    window: float = 0.0         # > 0: aggregate numeric samples and publish the mean every window seconds
+    window_entities: bool = False  # with window: also add min/max/count sensors
+
+
+DEFAULT_FILTER = WriteFilter()
+
+# Per device class (as assigned by sensor._SENSOR_META)
+CLASS_FILTERS: dict[str, WriteFilter] = {
+    "temperature": WriteFilter(abs_deadband=0.1, min_interval=5),
+    "humidity": WriteFilter(abs_deadband=0.5, min_interval=5),
+    "pressure": WriteFilter(abs_deadband=0.2, min_interval=10),
+    "carbon_dioxide": WriteFilter(abs_deadband=10, min_interval=5),
+    "carbon_monoxide": WriteFilter(abs_deadband=1, min_interval=5),
+    "nitrogen_dioxide": WriteFilter(abs_deadband=0.01, min_interval=5),
+    "volatile_organic_compounds_parts": WriteFilter(rel_deadband=0.05, min_interval=5),
+    "pm1": WriteFilter(abs_deadband=1, min_interval=5),
+    "pm25": WriteFilter(abs_deadband=1, min_interval=5),
+    "pm10": WriteFilter(abs_deadband=1, min_interval=5),
+    "illuminance": WriteFilter(rel_deadband=0.05, min_interval=2),
+    "battery": WriteFilter(abs_deadband=1, min_interval=60),
+    "voltage": WriteFilter(rel_deadband=0.01, min_interval=2),
+    "current": WriteFilter(rel_deadband=0.02, min_interval=2),
+    "power": WriteFilter(rel_deadband=0.02, min_interval=2),
+    "energy": WriteFilter(abs_deadband=0.01, min_interval=10),
+    "signal_strength": WriteFilter(abs_deadband=3, min_interval=30),
+    "sound_pressure": WriteFilter(abs_deadband=1, min_interval=2),
+}
+
+_FILTER_FIELDS = {f.name for f in fields(WriteFilter)}
+
+
+def parse_sensor_filters(text: str) -> dict[str, dict[str, dict[str, float]]]:
+    """Parse the sensor_filters option.
+
+    JSON of the form {dev_id: {metric|device_class|"*": {field: number}}},
+    where dev_id may be "*" for every device and fields are those of
+    WriteFilter. Raises ValueError on anything else.
+    """
+    if not text or not text.strip():
+        return {}
+    raw = json.loads(text)
+    if not isinstance(raw, dict):
+        raise ValueError("sensor_filters must be a JSON object")
+    for dev_id, metrics in raw.items():
+        if not isinstance(metrics, dict):
+            raise ValueError(f"sensor_filters[{dev_id}] must be an object")
+        for metric, values in metrics.items():
+            if not isinstance(values, dict):
+                raise ValueError(f"sensor_filters[{dev_id}][{metric}] must be an object")
+            for key, v in values.items():
+                if key not in _FILTER_FIELDS:
+                    raise ValueError(f"unknown filter field {key!r}")
+                if key == "window_entities":
+                    if not isinstance(v, bool):
+                        raise ValueError("window_entities must be true or false")
+                elif isinstance(v, bool) or not isinstance(v, (int, float)) or v < 0:
+                    raise ValueError(f"{key} must be a number >= 0")
+    return raw
+
+
+def resolve_filter(
+    overrides: dict[str, dict[str, dict[str, float]]], dev_id: str, metric: str, device_class: str | None
+) -> WriteFilter:
+    filt = CLASS_FILTERS.get(device_class or "", DEFAULT_FILTER)
+    for dev_key in ("*", dev_id):
+        per_dev = overrides.get(dev_key)
+        if not per_dev:
+            continue
+        for key in ("*", device_class, metric):
+            if key and key in per_dev:
+                filt = replace(filt, **per_dev[key])
+    return filt
@@ -23,13 +23,8 @@ async def async_setup_entry(
     # Track which devices we've already created entities for
     created_devices = set()
 
-    @callback
-    def async_discover_switch(dev_id: str, dev_class: str, info: dict):
-        """Discover and add new ET-Bus switch(es)."""
-        
-        if dev_id in created_devices:
-            _LOGGER.debug("ET-Bus: device %s already created, skipping", dev_id)
-            return
+    def build_switches(dev_id: str, dev_class: str, info: dict, restored: bool = False) -> list:
+        """Build the switch entities for one device."""
 
         # Get persisted state for this device
         saved = hub.get_last_reported_state(dev_id)
@@ -71,12 +66,11 @@ async def async_setup_entry(
                         dev_class=dev_class,
                         device_info=info,
                         initial_on=initial_on,
+                        restored=restored,
                     )
                     entities.append(entity)
                 
-                async_add_entities(entities)
-                created_devices.add(dev_id)
-                return
+                return entities
         
         # Single switch device (legacy/simple)
         _LOGGER.debug("ET-Bus: discovered single switch %s", dev_id)
@@ -95,10 +89,44 @@ async def async_setup_entry(
             dev_class=dev_class,
             device_info=info,
             initial_on=initial_on,
+            restored=restored,
         )
-        async_add_entities([entity])
+        return [entity]
+
+    @callback
+    def async_discover_switch(dev_id: str, dev_class: str, info: dict):
+        """Discover and add new ET-Bus switch(es)."""
+        
+        if dev_id in created_devices:
+            _LOGGER.debug("ET-Bus: device %s already created, skipping", dev_id)
+            return
+
+        async_add_entities(build_switches(dev_id, dev_class, info))
         created_devices.add(dev_id)
 
+    # Cached multi-switch boards are restored in one go; like the live path,
+    # nothing else is created here
+    restored_entities = []
+    for dev_id, dev_class, desc in hub.known_devices():
+        if "switch" not in dev_class.lower() or dev_id in created_devices:
+            continue
+        switches = desc.get("switches")
+        if not isinstance(switches, list) or not switches:
+            continue
+        if not all(isinstance(sw, dict) and "id" in sw for sw in switches):
+            continue
+        device_info = {
+            "name": desc.get("name", dev_id),
+            "model": desc.get("model", "Multi-Switch"),
+            "version": desc.get("version", "1.0"),
+            "switches": switches,
+        }
+        restored_entities.extend(build_switches(dev_id, dev_class, device_info, restored=True))
+        created_devices.add(dev_id)
+    if restored_entities:
+        async_add_entities(restored_entities)
+        _LOGGER.debug("ET-Bus: restored %d switches from discovery cache", len(restored_entities))
+
     @callback
     def async_handle_message(msg: dict):
         """Handle all ET-Bus messages - watch for discovery and state."""
@@ -137,7 +165,7 @@ async def async_setup_entry(
                         async_discover_switch(dev_id, dev_class or "switch.multi", device_info)
 
     # Register the unified message handler
-    hub.register_listener(async_handle_message)
+    config_entry.async_on_unload(hub.register_listener(async_handle_message, name="switch"))
 
 
 class ETBusSingleSwitch(SwitchEntity):
@@ -154,6 +182,7 @@ class ETBusSingleSwitch(SwitchEntity):
         dev_class: str,
         device_info: dict,
         initial_on: bool = False,
+        restored: bool = False,
     ):
         """Initialize single switch."""
         self._hub = hub
@@ -162,6 +191,8 @@ class ETBusSingleSwitch(SwitchEntity):
         self._attr_name = name
         self._attr_unique_id = "etbus_" + dev_id
         self._attr_is_on = initial_on
+        # Shows the cached on/off until the device reports
+        self._attr_assumed_state = restored
 
         # Device info for HA device registry
         self._attr_device_info = {
@@ -178,7 +209,7 @@ class ETBusSingleSwitch(SwitchEntity):
     @property
     def available(self) -> bool:
         """Dynamic availability from hub device tracker — same as light.py."""
-        return bool(self._hub.devices.get(self._dev_id, {}).get("online", True))
+        return self._hub.device_available(self._dev_id)
 
     async def async_added_to_hass(self) -> None:
         """Subscribe to state updates."""
@@ -193,6 +224,8 @@ class ETBusSingleSwitch(SwitchEntity):
 
             payload = msg.get("payload", {})
             old_state = self._attr_is_on
+            confirmed = self._attr_assumed_state
+            self._attr_assumed_state = False
             
             # Update state from device report
             if "on" in payload:
@@ -200,6 +233,8 @@ class ETBusSingleSwitch(SwitchEntity):
             elif "state" in payload:
                 self._attr_is_on = str(payload["state"]).upper() == "ON"
             else:
+                if confirmed:
+                    self.async_write_ha_state()
                 return
 
             if old_state != self._attr_is_on:
@@ -209,7 +244,7 @@ class ETBusSingleSwitch(SwitchEntity):
 
             self.async_write_ha_state()
 
-        self._hub.register_listener(handle_message)
+        self.async_on_remove(self._hub.register_listener(handle_message, dev_id=self._dev_id, name="switch.single"))
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on switch."""
@@ -237,6 +272,7 @@ class ETBusMultiSwitch(SwitchEntity):
         dev_class: str,
         device_info: dict,
         initial_on: bool = False,
+        restored: bool = False,
     ):
         """Initialize multi-switch entity."""
         self._hub = hub
@@ -246,6 +282,8 @@ class ETBusMultiSwitch(SwitchEntity):
         self._attr_name = name
         self._attr_unique_id = "etbus_" + dev_id + "_" + str(switch_id)
         self._attr_is_on = initial_on
+        # Channel state is a cached guess until the first report
+        self._attr_assumed_state = restored
 
         # Device info - all switches share same device
         self._attr_device_info = {
@@ -265,7 +303,7 @@ class ETBusMultiSwitch(SwitchEntity):
     @property
     def available(self) -> bool:
         """Dynamic availability from hub device tracker — same as light.py."""
-        return bool(self._hub.devices.get(self._dev_id, {}).get("online", True))
+        return self._hub.device_available(self._dev_id)
 
     async def async_added_to_hass(self) -> None:
         """Subscribe to state updates."""
@@ -280,6 +318,10 @@ class ETBusMultiSwitch(SwitchEntity):
 
             payload = msg.get("payload", {})
 
+            if self._attr_assumed_state:
+                self._attr_assumed_state = False
+                self.async_write_ha_state()
+
             # Multi-switch state format: {"switches": {"1": true, "2": false}}
             if "switches" in payload:
                 switches_state = payload["switches"]
@@ -298,7 +340,7 @@ class ETBusMultiSwitch(SwitchEntity):
 
                         self.async_write_ha_state()
 
-        self._hub.register_listener(handle_message)
+        self.async_on_remove(self._hub.register_listener(handle_message, dev_id=self._dev_id, name="switch.multi"))
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn on this switch."""
@@ -0,0 +1,12 @@
+import sys
+import types
+from pathlib import Path
+
+# The repository root is the integration itself (custom_components/etbus);
+# expose it as the "etbus" package so relative imports resolve.
+ROOT = Path(__file__).resolve().parents[1]
+
+if "etbus" not in sys.modules:
+    _pkg = types.ModuleType("etbus")
+    _pkg.__path__ = [str(ROOT)]
+    sys.modules["etbus"] = _pkg
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from etbus import hub as hub_mod  # noqa: E402
+from etbus.hub import _CoalescedStore, _TxCounterLease  # noqa: E402
+
+BLOCK = 16
+
+
+def _restart(disk: dict[str, int]) -> tuple[_TxCounterLease, dict[str, int]]:
+    """Start like the hub does: load the stored marks and write the new block."""
+    lease = _TxCounterLease(block=BLOCK)
+    lease.load(disk)
+    disk = lease.marks()
+    lease.persisted(disk)
+    return lease, disk
+
+
+def _send(lease: _TxCounterLease, disk: dict[str, int], n: int, *, flush: bool = True) -> list[int]:
+    """Hand out up to n counters; renewals reach the disk only if flush is set."""
+    out = []
+    for _ in range(n):
+        ctr, renewed = lease.next("dev")
+        if ctr is None:
+            break
+        out.append(ctr)
+        if renewed and flush:
+            disk.update(lease.marks())
+            lease.persisted(disk)
+    return out
+
+
+def test_first_lease_is_persisted_before_use():
+    lease = _TxCounterLease(block=BLOCK)
+    assert lease.reserve("dev", 1000)
+    assert not lease.reserve("dev", 5000)
+
+    # Reserved but not on disk yet: nothing may go out
+    assert not lease.ready("dev")
+    assert lease.next("dev") == (None, False)
+
+    disk = lease.marks()
+    assert disk == {"dev": 1000 + BLOCK}
+    lease.persisted(disk)
+    assert lease.next("dev") == (1000, False)
+
+
+def test_restart_from_persisted_mark_never_reuses():
+    disk = {"dev": 100}
+    used: list[int] = []
+    for n in (5, BLOCK * 3, 0, BLOCK // 2 + 1, 1):
+        lease, disk = _restart(disk)
+        used += _send(lease, disk, n)
+
+    assert used == sorted(set(used))
+    assert used[0] == 101
+
+
+def test_unflushed_renewal_is_never_used_or_reused():
+    disk = {"dev": 100}
+    lease, disk = _restart(disk)
+    stored = dict(disk)
+
+    # The renewal write never lands: the lease stops at the stored mark
+    before = _send(lease, disk, BLOCK * 4, flush=False)
+    assert before[-1] == stored["dev"]
+    assert lease.next("dev") == (None, False)
+
+    # Crash and restart from the mark that did reach the disk
+    lease, disk = _restart(stored)
+    after = _send(lease, disk, BLOCK * 2)
+    assert after[0] > before[-1]
+    assert not set(before) & set(after)
+
+
+def test_load_waits_for_its_own_write():
+    lease = _TxCounterLease(block=BLOCK)
+    lease.load({"dev": 100})
+    assert lease.next("dev") == (None, False)
+    lease.persisted(lease.marks())
+    assert lease.next("dev") == (101, False)
+
+
+class _FlakyStore:
+    """Store whose first async_save raises."""
+
+    def __init__(self, hass, version, key):
+        self.fail = 1
+        self.data = None
+
+    async def async_save(self, data):
+        if self.fail:
+            self.fail -= 1
+            raise OSError("disk full")
+        self.data = data
+
+
+class _Hass:
+    def __init__(self, loop):
+        self.loop = loop
+
+    def async_create_task(self, coro):
+        return self.loop.create_task(coro)
+
+
+def test_failed_write_is_retried_until_the_lease_is_ready(monkeypatch):
+    monkeypatch.setattr(hub_mod, "Store", _FlakyStore)
+
+    async def run():
+        lease = _TxCounterLease(block=BLOCK)
+        store = _CoalescedStore(
+            _Hass(asyncio.get_running_loop()), "tx", lease.marks, 0.01, on_saved=lease.persisted
+        )
+        lease.reserve("dev", 1000)
+        store.mark_dirty()
+
+        await store.async_flush()
+        assert not lease.ready("dev")
+        assert store.stats()["dirty"]
+
+        # The re-armed staleness timer writes again on its own
+        await asyncio.sleep(0.05)
+        assert lease.ready("dev")
+        assert store._store.data == {"dev": 1000 + BLOCK}
+        assert lease.next("dev") == (1000, False)
+
+    asyncio.run(run())